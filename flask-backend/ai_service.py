@@ -2,9 +2,9 @@
 import os
 import json
 import re
-import requests
 from datetime import datetime, timedelta
 from openai import OpenAI
+from http_client import http_client
 
 # xAI SDK for Agent Tools API (replaces deprecated search_parameters)
 try:
@@ -53,7 +53,7 @@ class AIService:
     def _fetch_real_fear_greed(self):
         """Fetch real Fear & Greed Index from Alternative.me API"""
         try:
-            response = requests.get("https://api.alternative.me/fng/?limit=1", timeout=5)
+            response = http_client.get("https://api.alternative.me/fng/?limit=1", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 if data and 'data' in data and len(data['data']) > 0:
@@ -83,12 +83,24 @@ except ImportError:
     print("[WARN] Flask-Caching module not found. Caching disabled.")
     # Mock Cache to prevent crash
     class MockCache:
-        def cached(self, timeout=60):
+        def cached(self, timeout=60, **kwargs):
             def decorator(f):
                 return f
             return decorator
     cache = MockCache()
 
+from swr_cache import swr_cached, swr_cache
+
+
+def cacheable_response(rv):
+    """cache.cached response_filter: skip error statuses and payloads with an 'error' field"""
+    response = rv[0] if isinstance(rv, tuple) else rv
+    status = rv[1] if isinstance(rv, tuple) and len(rv) > 1 else getattr(response, 'status_code', 200)
+    if isinstance(status, int) and status >= 400:
+        return False
+    payload = response.get_json(silent=True) if hasattr(response, 'get_json') else None
+    return not (isinstance(payload, dict) and 'error' in payload)
+
 # ----------------------------------------------------
 # JSON ENCODER FIX (For numpy types)
 # ----------------------------------------------------
@@ -323,6 +335,24 @@ def system_status():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/admin/cache-stats', methods=['GET'])
+def cache_stats():
+    """Candle cache counters (hits / misses / coalesced / evictions), exchange rate limits, source health and HTTP circuit breakers"""
+    try:
+        from market_provider import market_data_service
+        from http_client import http_client
+        from rate_limiter import rate_limiter_stats
+        return jsonify({
+            "candle_cache": market_data_service.get_cache_stats(),
+            "rate_limits": rate_limiter_stats(),
+            "sources": market_data_service.get_source_stats(),
+            "swr_cache": swr_cache.stats(),
+            "http_breakers": http_client.stats(),
+            "server_time": datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/analysis/latest', methods=['GET'])
 def get_latest_analysis():
     """Get latest analysis directly from AI Service (bypassing Supabase RLS)"""
@@ -351,11 +381,11 @@ def api_pingtest():
     return jsonify({"status": "ok"}), 200
 
 @app.route('/api/prices/performance')
-@cache.cached(timeout=60, query_string=True)  # 60초 캐시, exchange 파라미터별 개별 캐시
+@swr_cached(fresh_for=60, max_stale=900)  # 60초 fresh, 이후 15분까지 stale 응답 + 백그라운드 갱신
 def api_price_performance():
     """
     Get Price Performance (DB First, then Live Fallback)
-    Cached for 60 seconds to prevent API overload
+    Fresh for 60 seconds; after that the last response is served while it refreshes in the background
     """
     exchange = request.args.get('exchange', 'upbit')
     limit = request.args.get('limit', default=20, type=int)
@@ -401,7 +431,7 @@ def api_price_performance():
 # SIMPLE ASSET DATA API (for Market Gate cards)
 # ============================================================
 @app.route('/api/crypto/asset/<symbol>')
-@cache.cached(timeout=10)  # Cache for 10 seconds for real-time
+@swr_cached(fresh_for=10, max_stale=120)  # Fresh for 10s, then served stale (max 2 min) while refreshing
 def api_crypto_asset(symbol):
     """Simple asset data for individual coin cards"""
     symbol = symbol.upper()
@@ -452,7 +482,9 @@ def api_crypto_asset(symbol):
             'volatility': volatility,
             'volume_signal': volume_signal,
             'ma_20': data.get('ma_20', 0),
-            'ma_50': data.get('ma_50', data.get('ma_20', 0)),
+            'ma_50': data.get('ema_50') or data.get('ma_50', data.get('ma_20', 0)),
+            'rsi': data.get('rsi_14'),
+            'macd_signal': data.get('macd_crossover', 'neutral'),
             'source': data.get('source', 'Unknown')
         })
         
@@ -534,61 +566,47 @@ def api_market_gate():
 # LEAD-LAG API
 # ============================================================
 @app.route('/api/crypto/lead-lag')
+@cache.cached(timeout=300, response_filter=cacheable_response)  # 오류 응답은 캐시하지 않음
 def api_lead_lag():
-    """Lead-Lag 분석 API (Granger Causality)"""
+    """Lead-Lag 분석 API (Granger Causality) - DB Read (computed daily by the scheduler)"""
     try:
-        # from crypto_market.lead_lag.data_fetcher import fetch_all_data
-        # from crypto_market.lead_lag.granger import find_granger_causal_indicators
-        # import pandas as pd
-        
-        # NOTE: Vercel 250MB limit optimization. 
-        # Statsmodels is too heavy. Using Pre-calculated / Mock data for now.
-        raise ImportError("Optimization: Using Mock Data")
-
-        # 데이터 수집
-        df = fetch_all_data(start_date="2020-01-01", resample="monthly")
-        
-        if df.empty:
-            raise ValueError("Data fetch failed or empty")
-        
-        # BTC MoM을 예측하는 선행 지표 찾기
-        target = "BTC_MoM"
-        if target not in df.columns:
-            target = "BTC"
-        
-        results = find_granger_causal_indicators(df, target=target, max_lag=6)
-        
-        leading_indicators = []
-        for r in results[:10]:
-            # 상관관계 계산
-            try:
-                corr = df[r.cause].corr(df[target].shift(r.best_lag))
-                corr_val = float(corr) if not pd.isna(corr) else 0
-            except:
-                corr_val = 0
-            
-            leading_indicators.append({
-                'variable': r.cause,
-                'lag': r.best_lag,
-                'p_value': r.best_p_value,
-                'correlation': corr_val,
-                'interpretation': r.get_interpretation()
-            })
+        if not supabase: raise RuntimeError("DB not connected")
+        
+        response = supabase.table('lead_lag_results').select(
+            'run_at, target, variable, lag, p_value, correlation, is_significant, interpretation'
+        ).order('run_at', desc=True).order('p_value', desc=False).limit(50).execute()
+        
+        rows = response.data or []
+        if not rows:
+            return jsonify({'target': 'BTC_MoM', 'leading_indicators': [], 'timestamp': datetime.now().isoformat()})
+        
+        # Latest run only
+        run_at = rows[0]['run_at']
+        latest = [r for r in rows if r['run_at'] == run_at]
+        leading_indicators = [
+            {
+                'variable': r['variable'],
+                'lag': r['lag'],
+                'p_value': r['p_value'],
+                'correlation': r['correlation'] or 0,
+                'interpretation': r['interpretation']
+            }
+            for r in latest if r['is_significant']
+        ][:10]
         
         return jsonify({
-            'target': target,
+            'target': latest[0]['target'],
             'leading_indicators': leading_indicators,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': run_at
         })
         
     except Exception as e:
         print(f"Lead-Lag API Error: {e}")
-        # Fallback Data (Mock) to ensure UI is not empty
         return jsonify({
-            'target': target if 'target' in locals() else 'BTC_MoM',
+            'target': 'BTC_MoM',
             'leading_indicators': [],
             'timestamp': datetime.now().isoformat(),
-            'error': "Analysis unavailable (Optimization Mode)"
+            'error': "Analysis unavailable"
         })
 
 
@@ -608,7 +626,11 @@ def api_vcp_signals():
             import json
             data = response.data[0]['data_json']
             if isinstance(data, str): data = json.loads(data)
-            return jsonify({'signals': data, 'count': len(data), 'timestamp': response.data[0]['created_at']})
+            # Newer rows: {'signals': [...], 'stats': {...}}; older rows: the bare list
+            stats = None
+            if isinstance(data, dict):
+                data, stats = data.get('signals', []), data.get('stats')
+            return jsonify({'signals': data, 'count': len(data), 'stats': stats, 'timestamp': response.data[0]['created_at']})
             
         return jsonify({'signals': [], 'count': 0, 'timestamp': datetime.now().isoformat()})
         
@@ -768,15 +790,6 @@ def api_eth_staking_history():
 # ============================================================
 
 
-SCREENER_SYMBOLS = [
-    'BTC', 'ETH', 'SOL', 'BNB', 'XRP',
-    'ADA', 'DOGE', 'AVAX', 'TRX', 'DOT',
-    'LINK', 'MATIC', 'SHIB', 'LTC', 'BCH',
-    'ATOM', 'UNI', 'ETC', 'FIL', 'NEAR',
-    'APT', 'INJ', 'RNDR', 'STX', 'IMX',
-    'ARB', 'OP', 'SUI', 'SEI', 'TIA'
-]
-
 @app.route('/api/screener/breakout')
 @cache.cached(timeout=30)
 def api_screener_breakout():
@@ -1175,12 +1188,12 @@ def api_crypto_listings():
 @app.route('/api/kimchi/upbit')
 def api_kimchi_upbit():
     """Fetch Kimchi Premium Data (Upbit vs Binance)"""
-    import requests
+    from http_client import http_client
     try:
         # 1. Exchange Rate (USD -> KRW)
         # Using a free public API for exchange rates
         try:
-            er_res = requests.get("https://api.exchangerate-api.com/v4/latest/USD", timeout=3)
+            er_res = http_client.get("https://api.exchangerate-api.com/v4/latest/USD", timeout=3)
             er_data = er_res.json()
             usd_krw = float(er_data['rates']['KRW'])
         except:
@@ -1188,12 +1201,12 @@ def api_kimchi_upbit():
             print("⚠️ Exchange Rate API failed, using fallback 1450.0")
 
         # 2. Upbit Price (KRW)
-        upbit_res = requests.get("https://api.upbit.com/v1/ticker?markets=KRW-BTC", timeout=3)
+        upbit_res = http_client.get("https://api.upbit.com/v1/ticker?markets=KRW-BTC", timeout=3)
         upbit_data = upbit_res.json()
         btc_krw = float(upbit_data[0]['trade_price'])
 
         # 3. Binance Price (USD)
-        binance_res = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT", timeout=3)
+        binance_res = http_client.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT", timeout=3)
         binance_data = binance_res.json()
         btc_usd = float(binance_data['price'])
 
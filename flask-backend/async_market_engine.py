@@ -0,0 +1,150 @@
+"""
+asyncio market data backend built on ccxt.async_support.
+
+One event loop runs in a daemon thread and owns a single async client per
+exchange, so aiohttp keeps their connections alive between calls. Sync code
+(Flask gthread workers, APScheduler jobs) submits work through the blocking
+facade methods, which lets batch scans fan out hundreds of requests on the
+loop while the existing call sites stay synchronous.
+"""
+import asyncio
+import atexit
+import threading
+
+from candle_cache import OhlcvPager
+from rate_limiter import attach_rate_limiter, current_lane, priority_lane
+
+try:
+    import ccxt.async_support as ccxt_async
+except ImportError:  # ccxt built without aiohttp
+    ccxt_async = None
+
+CLIENT_OPTIONS = {
+    'binance': {'options': {'defaultType': 'spot'}},
+}
+
+
+class AsyncMarketEngine:
+    def __init__(self, max_concurrency=32, timeout_ms=3000):
+        self.max_concurrency = max_concurrency
+        self.timeout_ms = timeout_ms
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return ccxt_async is not None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='async-market-engine', daemon=True)
+            thread.start()
+            self._loop, self._thread = loop, thread
+            atexit.register(self.close)
+            return loop
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine on the engine loop and block for its result.
+        The caller's rate-limit lane is carried over to the loop.
+        """
+        lane = current_lane()
+
+        async def in_lane():
+            with priority_lane(lane):
+                return await coro
+
+        future = asyncio.run_coroutine_threadsafe(in_lane(), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def _client(self, exchange_id):
+        # Only called on the loop thread, so no locking needed
+        client = self._clients.get(exchange_id)
+        if client is None:
+            config = {'timeout': self.timeout_ms}
+            config.update(CLIENT_OPTIONS.get(exchange_id, {}))
+            # Throttling is done by our shared per-exchange token buckets
+            client = attach_rate_limiter(getattr(ccxt_async, exchange_id)(config), is_async=True)
+            self._clients[exchange_id] = client
+        return client
+
+    async def _call(self, exchange_id, method, *args, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            client = self._client(exchange_id)
+            return await getattr(client, method)(*args, **kwargs)
+
+    async def fetch_ohlcv(self, exchange_id, pair, timeframe='1d', since=None, limit=200):
+        """fetch_ohlcv paginated past the exchange's per-call limit"""
+        pager = OhlcvPager(exchange_id, timeframe, since, limit)
+        while pager.pending():
+            pager.add(await self._call(exchange_id, 'fetch_ohlcv', pair, timeframe=timeframe, since=pager.since, limit=pager.limit))
+        return pager.rows
+
+    async def fetch_tickers(self, exchange_id, pairs=None):
+        client = self._client(exchange_id)
+        if not client.markets:
+            await self._call(exchange_id, 'load_markets')
+        return await self._call(exchange_id, 'fetch_tickers', pairs)
+
+    # ------------------------------------------------------------------
+    # Sync facade
+    # ------------------------------------------------------------------
+    def fetch_ohlcv_many(self, exchange_id, requests, timeout=None):
+        """
+        requests: { key: (pair, timeframe, since, limit) }
+        Returns { key: rows | Exception } - every request runs concurrently. With a
+        `timeout`, requests still running at the deadline are cancelled and come
+        back as TimeoutError while the finished ones are kept.
+        """
+        async def gather():
+            tasks = {asyncio.ensure_future(self.fetch_ohlcv(exchange_id, *args)): key for key, args in requests.items()}
+            if not tasks:
+                return {}
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            out = {}
+            for task in pending:
+                task.cancel()
+                out[tasks[task]] = TimeoutError(f"No candles within {timeout}s")
+            for task in done:
+                error = task.exception()
+                out[tasks[task]] = error if error is not None else task.result()
+            return out
+
+        return self.run(gather(), None if timeout is None else timeout + 5)
+
+    def fetch_tickers_sync(self, exchange_id, pairs=None, timeout=None):
+        return self.run(self.fetch_tickers(exchange_id, pairs), timeout)
+
+    def close(self):
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+
+        async def close_clients():
+            for client in list(self._clients.values()):
+                try:
+                    await client.close()
+                except Exception:
+                    pass
+            self._clients.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_clients(), loop).result(5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+
+async_market_engine = AsyncMarketEngine()
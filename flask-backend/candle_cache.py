@@ -0,0 +1,363 @@
+"""
+Process-wide OHLCV candle cache shared by every MarketDataService caller.
+
+Entries are keyed by (exchange, pair, timeframe), expire after a per-timeframe
+TTL and are evicted least-recently-used once the total number of cached bars
+exceeds the memory bound. Concurrent misses for the same key are coalesced so
+that only one caller hits the exchange while the others wait for its result.
+
+Expired series are refreshed incrementally: only bars from the last cached
+(still-forming) bar onward are requested, which replace the open bar and
+append whatever closed since.
+
+Downloads longer than an exchange's per-call candle limit are paginated
+(OhlcvPager), so deep histories (e.g. 365 daily Upbit bars) arrive in one
+refresh instead of growing a bar per day.
+
+Series are held as read-only (n, 6) float64 arrays. Cold misses read through
+the on-disk CandleStore first and every refresh is written back to it, so a
+restarted process only has to fetch the bars it missed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from candle_store import candle_store, as_candle_array, merge_candles
+
+# Seconds a cached series is served before it is refetched.
+TIMEFRAME_TTL = {
+    '1m': 15,
+    '5m': 30,
+    '15m': 60,
+    '1h': 60,
+    '4h': 120,
+    '1d': 180,
+}
+DEFAULT_TTL = 60
+
+TIMEFRAME_MS = {
+    '1m': 60_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '1h': 3_600_000,
+    '4h': 14_400_000,
+    '1d': 86_400_000,
+}
+
+# Most candles a single fetch_ohlcv call returns per exchange
+OHLCV_PAGE_LIMIT = {
+    'upbit': 200,
+    'binance': 1000,
+    'bithumb': 1000,
+}
+DEFAULT_PAGE_LIMIT = 200
+
+
+class OhlcvPager:
+    """
+    Splits a loader(since, count) request into fetch_ohlcv calls of at most the
+    exchange's per-call limit, walking `since` forward until `count` bars or the
+    current bar. since=None starts `count` bars back from now. Requests that fit
+    in one call are passed through unchanged. Used by the sync and async loaders:
+
+        pager = OhlcvPager(exchange_id, timeframe, since, count)
+        while pager.pending():
+            pager.add(fetch_ohlcv(pair, timeframe, since=pager.since, limit=pager.limit))
+        rows = pager.rows
+    """
+    def __init__(self, exchange_id, timeframe, since, count):
+        self.page = OHLCV_PAGE_LIMIT.get(exchange_id, DEFAULT_PAGE_LIMIT)
+        self.count = count
+        self.tf_ms = TIMEFRAME_MS.get(timeframe)
+        self.single = count <= self.page or self.tf_ms is None
+        self.now_ms = int(time.time() * 1000)
+        if since is None and not self.single:
+            since = (self.now_ms // self.tf_ms - count + 1) * self.tf_ms
+        self.since = since
+        self.rows = []
+        self.calls = 0
+
+    @property
+    def limit(self):
+        return self.count if self.single else min(self.page, self.count - len(self.rows))
+
+    def pending(self):
+        if self.single:
+            return self.calls == 0
+        return len(self.rows) < self.count and self.since <= self.now_ms
+
+    def add(self, batch):
+        self.calls += 1
+        if self.single:
+            self.rows = batch
+            return
+        # Pages can overlap (Upbit counts back from its `to` time); keep only newer bars
+        batch = [row for row in batch or [] if not self.rows or row[0] > self.rows[-1][0]]
+        if batch:
+            self.rows.extend(batch)
+            self.since = int(batch[-1][0]) + self.tf_ms
+        else:
+            # Nothing in this page (before the listing) - move on to the next one
+            self.since += self.page * self.tf_ms
+
+
+class _Entry:
+    __slots__ = ('rows', 'limit', 'fetched_at')
+
+    def __init__(self, rows, limit, fetched_at):
+        self.rows = rows
+        self.limit = limit
+        self.fetched_at = fetched_at
+
+
+class CandleCache:
+    def __init__(self, max_bars=200_000, ttls=None, store=None):
+        self.max_bars = max_bars
+        self.ttls = dict(TIMEFRAME_TTL)
+        if ttls:
+            self.ttls.update(ttls)
+        self.store = store
+
+        self._entries = OrderedDict()  # key -> _Entry (LRU order)
+        self._inflight = {}            # key -> Future of the running fetch
+        self._bars = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.incremental = 0
+        self.disk_reads = 0
+
+    def ttl_for(self, timeframe):
+        return self.ttls.get(timeframe, DEFAULT_TTL)
+
+    def _is_fresh(self, key, entry, limit, now, closed_only=False):
+        """
+        TTL check. Callers that only read closed bars (closed_only) can keep using
+        an entry until a new bar opens, since closed bars never change.
+        """
+        if entry is None or entry.limit < limit:
+            return False
+        if closed_only:
+            tf_ms = TIMEFRAME_MS.get(key[2])
+            if tf_ms is not None:
+                return int(now * 1000) // tf_ms == int(entry.fetched_at * 1000) // tf_ms
+        return now - entry.fetched_at < self.ttl_for(key[2])
+
+    def get_or_load(self, key, loader, limit, closed_only=False):
+        """
+        Return up to `limit` bars for key=(exchange, pair, timeframe).
+        `loader(since, count)` is called on a miss and must return a list of
+        [timestamp, open, high, low, close, volume] rows; `since` is None for
+        a full download, otherwise the open time of the last cached bar.
+        The result is a read-only (n, 6) float64 array.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._is_fresh(key, entry, limit, now, closed_only):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.rows[-limit:]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()[-limit:]
+
+        try:
+            fetched_at = time.time()
+            ready, base, since, count, window = self._plan(key, entry, limit)
+            rows = ready if ready is not None else self._apply(key, base, loader(since, count), since, window)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, _Entry(rows, window, fetched_at))
+            self._inflight.pop(key, None)
+        future.set_result(rows)
+        return rows[-limit:]
+
+    def get_many(self, requests, bulk_loader, closed_only=()):
+        """
+        Batch form of get_or_load for requests={key: limit}; keys listed in
+        `closed_only` are only read for their closed bars.
+        `bulk_loader({key: (since, count)})` must return {key: rows | Exception}
+        and is called once for every key that is neither fresh nor already being
+        fetched by another caller. Returns {key: array | Exception}.
+        """
+        now = time.time()
+        out, owned, waiting = {}, {}, {}
+        with self._lock:
+            for key, limit in requests.items():
+                entry = self._entries.get(key)
+                if self._is_fresh(key, entry, limit, now, key in closed_only):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    out[key] = entry.rows[-limit:]
+                    continue
+                future = self._inflight.get(key)
+                if future is not None:
+                    self.coalesced += 1
+                    waiting[key] = future
+                else:
+                    self.misses += 1
+                    future = Future()
+                    self._inflight[key] = future
+                    owned[key] = (entry, future)
+
+        fetched_at = time.time()
+        plans, pending = {}, {}
+        for key, (entry, future) in owned.items():
+            try:
+                plans[key] = self._plan(key, entry, requests[key])
+            except Exception as e:
+                plans[key] = e
+                continue
+            ready, _, since, count, _ = plans[key]
+            if ready is None:
+                pending[key] = (since, count)
+
+        try:
+            fresh = bulk_loader(pending) if pending else {}
+        except Exception as e:
+            fresh = {key: e for key in pending}
+
+        for key, (entry, future) in owned.items():
+            plan = plans[key]
+            try:
+                if isinstance(plan, Exception):
+                    raise plan
+                ready, base, since, count, window = plan
+                if ready is not None:
+                    rows = ready
+                else:
+                    result = fresh.get(key)
+                    if result is None:
+                        raise ValueError(f"No candles returned for {key}")
+                    if isinstance(result, BaseException):
+                        raise result
+                    rows = self._apply(key, base, result, since, window)
+            except Exception as e:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                future.set_exception(e)
+                out[key] = e
+                continue
+
+            with self._lock:
+                self._store(key, _Entry(rows, window, fetched_at))
+                self._inflight.pop(key, None)
+            future.set_result(rows)
+            out[key] = rows[-requests[key]:]
+
+        for key, future in waiting.items():
+            try:
+                out[key] = future.result()[-requests[key]:]
+            except Exception as e:
+                out[key] = e
+        return out
+
+    def _plan(self, key, entry, limit):
+        """
+        Decide how to bring `key` up to date.
+        Returns (ready, base, since, count, window): `ready` is a series that can be
+        served as is (fresh disk copy), otherwise `loader(since, count)` must be
+        called and its bars merged into `base` (None for a full download).
+        """
+        if entry is None and self.store is not None:
+            stored = self.store.read(key)
+            if stored is not None and len(stored):
+                depth = len(stored)
+                # A shorter series that already starts at the listing (or fills the
+                # store) is as deep as a new download would be
+                if depth >= min(limit, self.store.max_bars) or self.store.history_start(key) == stored[0][0]:
+                    depth = max(depth, limit)
+                entry = _Entry(stored, depth, self.store.modified_at(key))
+                with self._lock:
+                    self.disk_reads += 1
+                # Written recently enough (e.g. right before a restart): serve the memmap as is
+                if entry.limit >= limit and time.time() - entry.fetched_at < self.ttl_for(key[2]):
+                    return entry.rows, None, None, None, entry.limit
+
+        tf_ms = TIMEFRAME_MS.get(key[2])
+        if entry is None or not len(entry.rows) or tf_ms is None:
+            return None, None, None, limit, limit
+
+        window = max(limit, entry.limit)
+        since = int(entry.rows[-1][0])
+        missing = int((time.time() * 1000 - since) // tf_ms) + 2
+        if missing >= window or entry.limit < limit:
+            # Too far behind or asked for deeper history - take the full window again
+            return None, entry.rows, None, window, window
+        return None, entry.rows, since, missing, window
+
+    def _apply(self, key, base, fresh, since, window):
+        """Merge freshly loaded bars into `base` and write the result through to disk"""
+        fresh = as_candle_array(fresh)
+        if since is not None:
+            with self._lock:
+                self.incremental += 1
+        rows = merge_candles(base, fresh, window) if base is not None else fresh[-window:]
+        if self.store is not None:
+            if since is None and 0 < len(fresh) < window:
+                # A full download came back short: the exchange has nothing older
+                self.store.mark_history_start(key, fresh[0][0])
+            self.store.write(key, rows)
+        return rows
+
+    def _store(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bars -= len(old.rows)
+        self._entries[key] = entry
+        self._bars += len(entry.rows)
+
+        # Evict least recently used series until we are back under the bound
+        while self._bars > self.max_bars and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bars -= len(evicted.rows)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bars = 0
+            else:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bars -= len(old.rows)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'incremental': self.incremental,
+                'disk_reads': self.disk_reads,
+                'entries': len(self._entries),
+                'bars': self._bars,
+                'max_bars': self.max_bars,
+                'inflight': len(self._inflight),
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            }
+
+
+candle_cache = CandleCache(store=candle_store)
@@ -0,0 +1,140 @@
+"""
+On-disk OHLCV history, one NumPy .npy file per (exchange, pair, timeframe).
+
+Each file holds a float64 array of shape (n, 6) laid out like ccxt candles
+([ts_ms, open, high, low, close, volume]) and is opened with mmap_mode='r', so
+reads are zero-copy views of the page cache. Writes merge the new bars with
+what is already on disk and atomically replace the file. index.json records
+the first bar of series whose full history is shorter than was asked for
+(recent listings), so they aren't re-downloaded in search of older bars.
+"""
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+OHLCV_WIDTH = 6
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'candles')
+
+
+def as_candle_array(rows):
+    """ccxt rows (list of lists) -> read-only float64 array of shape (n, 6)"""
+    arr = np.asarray(rows, dtype=np.float64)
+    if arr.size == 0:
+        arr = np.empty((0, OHLCV_WIDTH), dtype=np.float64)
+    arr = arr.reshape(-1, OHLCV_WIDTH)
+    arr.flags.writeable = False
+    return arr
+
+
+def merge_candles(rows, fresh, limit):
+    """Replace bars from the first fresh timestamp onward and keep the last `limit`"""
+    if fresh is None or len(fresh) == 0:
+        return rows[-limit:]
+    if rows is None or len(rows) == 0:
+        return fresh[-limit:]
+    kept = rows[rows[:, 0] < fresh[0, 0]]
+    merged = np.concatenate([kept, fresh])[-limit:]
+    merged.flags.writeable = False
+    return merged
+
+
+class CandleStore:
+    def __init__(self, root=None, max_bars=None):
+        self.root = root or os.getenv('CANDLE_STORE_DIR', DEFAULT_STORE_DIR)
+        self.max_bars = max_bars or int(os.getenv('CANDLE_STORE_MAX_BARS', '1500'))
+        self.enabled = os.getenv('CANDLE_STORE_DISABLED', '').lower() not in ('1', 'true', 'yes')
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._history_starts = None  # index.json, loaded on first use
+
+    def _path(self, key):
+        exchange, pair, timeframe = key
+        safe_pair = re.sub(r'[^A-Za-z0-9]+', '-', pair)
+        return os.path.join(self.root, exchange, f"{safe_pair}_{timeframe}.npy")
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def read(self, key):
+        """Memory-mapped history for key, or None if nothing is stored"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            arr = np.load(path, mmap_mode='r')
+            if arr.ndim != 2 or arr.shape[1] != OHLCV_WIDTH:
+                return None
+            return arr
+        except Exception as e:
+            print(f"[CandleStore] Read failed for {key}: {e}")
+            return None
+
+    def _index_path(self):
+        return os.path.join(self.root, 'index.json')
+
+    def _index(self):
+        if self._history_starts is None:
+            try:
+                with open(self._index_path()) as f:
+                    self._history_starts = json.load(f)
+            except (OSError, ValueError):
+                self._history_starts = {}
+        return self._history_starts
+
+    def history_start(self, key):
+        """Open time of the exchange's first bar for key, if a download has reached it"""
+        if not self.enabled:
+            return None
+        with self._locks_guard:
+            return self._index().get('/'.join(key))
+
+    def mark_history_start(self, key, ts):
+        if not self.enabled:
+            return
+        with self._locks_guard:
+            index = self._index()
+            if index.get('/'.join(key)) == float(ts):
+                return
+            index['/'.join(key)] = float(ts)
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, self._index_path())
+            except Exception as e:
+                print(f"[CandleStore] Index write failed: {e}")
+
+    def modified_at(self, key):
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return 0.0
+
+    def write(self, key, rows):
+        """Merge `rows` into the stored history (bounded to max_bars)"""
+        if not self.enabled or rows is None or len(rows) == 0:
+            return
+        path = self._path(key)
+        with self._lock(key):
+            try:
+                merged = merge_candles(self.read(key), rows, self.max_bars)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(merged))
+                os.replace(tmp_path, path)
+            except Exception as e:
+                # Read-only filesystems (e.g. serverless) just run without persistence
+                print(f"[CandleStore] Write failed for {key}, disabling store: {e}")
+                self.enabled = False
+
+
+candle_store = CandleStore()
@@ -0,0 +1,27 @@
+-- Create table for Lead-Lag (Granger causality) results
+-- One row per candidate indicator per scheduler run; the API serves the latest run_at.
+create table if not exists public.lead_lag_results (
+  id bigint generated always as identity primary key,
+  run_at timestamp with time zone not null,
+  target text not null,
+  variable text not null,
+  lag integer not null,
+  p_value double precision not null,
+  f_statistic double precision null,
+  correlation double precision null,
+  is_significant boolean not null default false,
+  interpretation text null,
+  observations integer null,
+  created_at timestamp with time zone not null default now()
+);
+
+create index if not exists idx_lead_lag_results_target_run on public.lead_lag_results (target, run_at desc);
+
+-- Enable RLS just in case (optional, depending on your policy)
+alter table public.lead_lag_results enable row level security;
+
+-- Allow read access to everyone (since it's public data)
+create policy "Enable read access for all users" on public.lead_lag_results
+  for select using (true);
+
+-- Writes come from the scheduler with the service role (bypasses RLS)
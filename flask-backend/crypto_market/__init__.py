@@ -1,3 +1,3 @@
-from .models import Candle
+from .models import Candle, CandleArray
 from .indicators import ema, atr, wick_ratio
 from .market_gate import evaluate_market_gate, run_market_gate_sync, MarketGateResult
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Vectorized indicators over a whole symbol universe at once.
+
+Inputs are 2-D float arrays of shape (symbols, bars), right-aligned so that the
+last column is the latest bar for every symbol; symbols with shorter history
+are NaN-padded on the left (see stack_columns / panel_from_frames). Every
+kernel works on the full matrix, so a scan costs a handful of array passes
+instead of a pandas pipeline per symbol. Values match the per-series
+functions in indicators.py.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def stack_columns(series: Sequence[np.ndarray], length: int = None) -> np.ndarray:
+    """Right-align 1-D arrays into a (len(series), length) matrix, NaN-padded on the left"""
+    if length is None:
+        length = max((len(s) for s in series), default=0)
+    out = np.full((len(series), length), np.nan)
+    for i, s in enumerate(series):
+        s = np.asarray(s, dtype=np.float64)[-length:]
+        if len(s):
+            out[i, length - len(s):] = s
+    return out
+
+
+def panel_from_frames(frames: Dict[str, pd.DataFrame], length: int = None) -> Dict[str, object]:
+    """
+    {symbol: OHLCV DataFrame} -> {'symbols': [...], 'Open': matrix, ..., 'Volume': matrix}
+    """
+    symbols = [sym for sym, df in frames.items() if df is not None and not df.empty]
+    panel = {'symbols': symbols}
+    for field in PANEL_FIELDS:
+        panel[field] = stack_columns([frames[sym][field].to_numpy() for sym in symbols], length)
+    return panel
+
+
+def ema(x: np.ndarray, span: int = None, alpha: float = None) -> np.ndarray:
+    """Row-wise EMA (pandas ewm(adjust=False)), seeded at each row's first valid value"""
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(x, dtype=np.float64)
+    state = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        value = x[:, t]
+        state = np.where(np.isnan(state), value, state + alpha * (value - state))
+        out[:, t] = state
+    return out
+
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    """Row-wise rolling mean; NaN until a full window of valid values"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= period:
+        out[:, period - 1:] = sliding_window_view(x, period, axis=1).mean(axis=-1)
+    return out
+
+
+def rolling_std(x: np.ndarray, period: int, ddof: int = 1) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= period:
+        out[:, period - 1:] = sliding_window_view(x, period, axis=1).std(axis=-1, ddof=ddof)
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder RSI for every row"""
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    valid = ~np.isnan(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[~valid] = np.nan
+    loss[~valid] = np.nan
+
+    avg_gain = ema(gain, alpha=1.0 / period)
+    avg_loss = ema(loss, alpha=1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+    # fmax skips NaN like DataFrame.max(axis=1) does for the first bar
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    return sma(true_range(high, low, close), period)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    """Latest MACD values per row; 'crossover' is an object array of the indicators.macd labels"""
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+
+    crossover = np.full(close.shape[0], 'neutral', dtype=object)
+    if close.shape[1] >= 2:
+        prev_macd, prev_signal = macd_line[:, -2], signal_line[:, -2]
+        curr_macd, curr_signal = macd_line[:, -1], signal_line[:, -1]
+        crossover[(prev_macd <= prev_signal) & (curr_macd > curr_signal)] = 'bullish_cross'
+        crossover[(prev_macd >= prev_signal) & (curr_macd < curr_signal)] = 'bearish_cross'
+
+    return {
+        'macd_line': macd_line[:, -1],
+        'signal_line': signal_line[:, -1],
+        'histogram': macd_line[:, -1] - signal_line[:, -1],
+        'crossover': crossover,
+    }
+
+
+def bollinger_bands(close: np.ndarray, period: int = 20, std_dev: int = 2) -> Dict[str, np.ndarray]:
+    """Latest bands per row; 'position' is 0 at the lower band, 1 at the upper band"""
+    window = close[:, -period:]
+    middle = window.mean(axis=1) if close.shape[1] >= period else np.full(close.shape[0], np.nan)
+    std = window.std(axis=1, ddof=1) if close.shape[1] >= period else np.full(close.shape[0], np.nan)
+    upper = middle + std * std_dev
+    lower = middle - std * std_dev
+
+    band_width = upper - lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position = np.where(band_width > 0, (close[:, -1] - lower) / band_width, 0.5)
+    return {
+        'upper': upper,
+        'middle': middle,
+        'lower': lower,
+        'position': np.clip(position, 0, 1),
+    }
+
+
+def relative_volume(volume: np.ndarray, period: int = 20) -> np.ndarray:
+    """Last bar volume over the mean of the last `period` bars (1.0 with short history)"""
+    window = volume[:, -period:]
+    enough = (~np.isnan(window)).sum(axis=1) >= period if volume.shape[1] >= period else np.zeros(volume.shape[0], bool)
+    avg = window.mean(axis=1) if volume.shape[1] >= period else np.full(volume.shape[0], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rvol = np.where(avg > 0, volume[:, -1] / avg, 1.0)
+    return np.where(enough, rvol, 1.0)
+
+
+def tail_mean(x: np.ndarray, period: int) -> np.ndarray:
+    """Mean of the last `period` bars that exist (like Series.tail(period).mean())"""
+    window = x[:, -period:]
+    counts = (~np.isnan(window)).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, np.nansum(window, axis=1) / np.maximum(counts, 1), np.nan)
+
+
+def annualized_volatility(close: np.ndarray, periods_per_year: int = 365) -> np.ndarray:
+    """Std of simple returns scaled to a year, in percent (0 with fewer than 2 returns)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = close[:, 1:] / close[:, :-1] - 1
+        counts = (~np.isnan(returns)).sum(axis=1)
+        std = np.nanstd(returns, axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(close.shape[0])
+    return np.where(counts > 1, std * np.sqrt(periods_per_year) * 100, 0.0)
+
+
+def compute_indicators(panel: Dict[str, object]) -> Dict[str, np.ndarray]:
+    """
+    Every screener indicator for every symbol of a panel in one pass.
+    Returns 1-D arrays aligned with panel['symbols'] (latest values), plus the
+    full 'rsi_series' matrix for divergence checks.
+    """
+    close, high, low, volume = panel['Close'], panel['High'], panel['Low'], panel['Volume']
+
+    rsi_series = rsi(close, 14)
+    macd_data = macd(close)
+    bb_data = bollinger_bands(close)
+
+    with np.errstate(all='ignore'):
+        return {
+            'close': close[:, -1],
+            'volume': volume[:, -1],
+            'rsi': rsi_series[:, -1],
+            'rsi_series': rsi_series,
+            'macd_line': macd_data['macd_line'],
+            'macd_signal_line': macd_data['signal_line'],
+            'macd_histogram': macd_data['histogram'],
+            'macd_crossover': macd_data['crossover'],
+            'bb_upper': bb_data['upper'],
+            'bb_middle': bb_data['middle'],
+            'bb_lower': bb_data['lower'],
+            'bb_position': bb_data['position'],
+            'atr': atr(high, low, close, 14)[:, -1],
+            'rvol': relative_volume(volume, 20),
+            'sma20': tail_mean(close, 20),
+            'sma200': tail_mean(close, 200),
+            'ath': np.nanmax(high, axis=1),
+            'atl': np.nanmin(low, axis=1),
+            'volatility': annualized_volatility(close),
+        }
+
+
+def indicator_rows(panel: Dict[str, object], table: Dict[str, np.ndarray]) -> List[dict]:
+    """Per-symbol dicts of the scalar indicators (for code that works one symbol at a time)"""
+    scalar_keys = [k for k, v in table.items() if np.ndim(v) == 1]
+    return [
+        {'symbol': sym, **{k: table[k][i] for k in scalar_keys}}
+        for i, sym in enumerate(panel['symbols'])
+    ]
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
+import numpy as np
 import pandas as pd
 
+from .models import Candle, CandleArray
+
 def ema(series: pd.Series, span: int) -> pd.Series:
     return series.ewm(span=span, adjust=False).mean()
 
@@ -98,28 +101,64 @@ def bollinger_bands(series: pd.Series, period: int = 20, std_dev: int = 2) -> di
     }
 
 
-def find_support_resistance(df: pd.DataFrame, lookback: int = 50) -> dict:
+def pivot_mask(values, window: int = 2, kind: str = 'low') -> np.ndarray:
+    """
+    Swing points along the last axis (1-D series or symbols x bars matrix).
+    A bar is a pivot low (high) when it is strictly below (above) the `window`
+    bars on each side; the first and last `window` bars can't be pivots.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    mask = np.zeros(x.shape, dtype=bool)
+    n = x.shape[-1]
+    if n < 2 * window + 1:
+        return mask
+
+    center = x[..., window:n - window]
+    is_pivot = np.ones(center.shape, dtype=bool)
+    for k in range(1, window + 1):
+        left = x[..., window - k:n - window - k]
+        right = x[..., window + k:n - window + k]
+        if kind == 'low':
+            is_pivot &= (center < left) & (center < right)
+        else:
+            is_pivot &= (center > left) & (center > right)
+    mask[..., window:n - window] = is_pivot
+    return mask
+
+
+def find_pivots(values, window: int = 2, kind: str = 'low') -> np.ndarray:
+    """Indices of the pivot lows / highs of a 1-D series (see pivot_mask)"""
+    return np.flatnonzero(pivot_mask(values, window, kind))
+
+
+def find_support_resistance(df: pd.DataFrame, lookback: int = 50, window: int = 2) -> dict:
     """
     Find nearest support and resistance levels using pivot points
+    Resistance is the lowest pivot high above the price, support the highest
+    pivot low below it; without a pivot on a side the recent highs/lows are used.
     Returns: dict with 'support', 'resistance', 'support_distance', 'resistance_distance'
     """
     if len(df) < lookback:
         lookback = len(df)
     
-    recent_df = df.tail(lookback)
-    current_price = df['Close'].iloc[-1]
+    highs = df['High'].to_numpy(dtype=np.float64)[-lookback:]
+    lows = df['Low'].to_numpy(dtype=np.float64)[-lookback:]
+    current_price = float(df['Close'].iloc[-1])
     
-    # Simple approach: use recent highs/lows as S/R levels
-    highs = recent_df['High'].values
-    lows = recent_df['Low'].values
+    pivot_highs = highs[find_pivots(highs, window, 'high')]
+    pivot_lows = lows[find_pivots(lows, window, 'low')]
     
-    # Find resistance: lowest high above current price
-    resistance_candidates = [h for h in highs if h > current_price]
-    resistance = min(resistance_candidates) if resistance_candidates else current_price * 1.05
+    # Find resistance: lowest (pivot) high above current price
+    resistance_candidates = pivot_highs[pivot_highs > current_price]
+    if not len(resistance_candidates):
+        resistance_candidates = highs[highs > current_price]
+    resistance = resistance_candidates.min() if len(resistance_candidates) else current_price * 1.05
     
-    # Find support: highest low below current price
-    support_candidates = [l for l in lows if l < current_price]
-    support = max(support_candidates) if support_candidates else current_price * 0.95
+    # Find support: highest (pivot) low below current price
+    support_candidates = pivot_lows[pivot_lows < current_price]
+    if not len(support_candidates):
+        support_candidates = lows[lows < current_price]
+    support = support_candidates.max() if len(support_candidates) else current_price * 0.95
     
     # Calculate distances as percentages
     resistance_distance = ((resistance - current_price) / current_price) * 100
@@ -143,43 +182,21 @@ def detect_rsi_divergence(price_series: pd.Series, rsi_series: pd.Series, lookba
     if len(price_series) < lookback or len(rsi_series) < lookback:
         return 'none'
     
-    recent_prices = price_series.tail(lookback)
-    recent_rsi = rsi_series.tail(lookback)
-    
-    # 최근 저점 2개 찾기
-    price_lows = []
-    rsi_lows = []
+    recent_prices = np.asarray(price_series, dtype=np.float64)[-lookback:]
+    recent_rsi = np.asarray(rsi_series, dtype=np.float64)[-lookback:]
     
-    for i in range(2, lookback - 2):
-        if (recent_prices.iloc[i] < recent_prices.iloc[i-1] and 
-            recent_prices.iloc[i] < recent_prices.iloc[i-2] and
-            recent_prices.iloc[i] < recent_prices.iloc[i+1] and
-            recent_prices.iloc[i] < recent_prices.iloc[i+2]):
-            price_lows.append((i, recent_prices.iloc[i]))
-            rsi_lows.append((i, recent_rsi.iloc[i]))
-    
-    # 강세 다이버전스: 가격 저점 하락, RSI 저점 상승
-    if len(price_lows) >= 2:
-        if (price_lows[-1][1] < price_lows[-2][1] and 
-            rsi_lows[-1][1] > rsi_lows[-2][1]):
+    # 강세 다이버전스: 최근 저점 2개 - 가격 저점 하락, RSI 저점 상승
+    lows = find_pivots(recent_prices, 2, 'low')
+    if len(lows) >= 2:
+        prev, last = lows[-2], lows[-1]
+        if recent_prices[last] < recent_prices[prev] and recent_rsi[last] > recent_rsi[prev]:
             return 'bullish_div'
     
-    # 최근 고점 2개 찾기
-    price_highs = []
-    rsi_highs = []
-    
-    for i in range(2, lookback - 2):
-        if (recent_prices.iloc[i] > recent_prices.iloc[i-1] and 
-            recent_prices.iloc[i] > recent_prices.iloc[i-2] and
-            recent_prices.iloc[i] > recent_prices.iloc[i+1] and
-            recent_prices.iloc[i] > recent_prices.iloc[i+2]):
-            price_highs.append((i, recent_prices.iloc[i]))
-            rsi_highs.append((i, recent_rsi.iloc[i]))
-    
-    # 약세 다이버전스: 가격 고점 상승, RSI 고점 하락
-    if len(price_highs) >= 2:
-        if (price_highs[-1][1] > price_highs[-2][1] and 
-            rsi_highs[-1][1] < rsi_highs[-2][1]):
+    # 약세 다이버전스: 최근 고점 2개 - 가격 고점 상승, RSI 고점 하락
+    highs = find_pivots(recent_prices, 2, 'high')
+    if len(highs) >= 2:
+        prev, last = highs[-2], highs[-1]
+        if recent_prices[last] > recent_prices[prev] and recent_rsi[last] < recent_rsi[prev]:
             return 'bearish_div'
     
     return 'none'
@@ -261,3 +278,248 @@ def get_entry_quality(rr_ratio: float, rsi: float, macd_cross: str, divergence:
         'label': label,
         'reasons': reasons
     }
+
+
+# ============================================================
+# Streaming (incremental) indicator state
+# ============================================================
+# Recursive indicators only need their previous state and the next bar, so a
+# series that grows by one candle can be updated in O(1) instead of
+# recomputing the whole history. Values match the functions above when fed
+# the same closed bars. Every state round-trips through snapshot() /
+# from_snapshot() as plain JSON-serializable dicts so it can be persisted.
+
+class StreamingIndicator:
+    kind = None
+    params = ()   # constructor arguments
+    fields = ()   # mutable state
+
+    def snapshot(self) -> dict:
+        snap = {'kind': self.kind}
+        for name in self.params + self.fields:
+            value = getattr(self, name)
+            if isinstance(value, StreamingIndicator):
+                value = value.snapshot()
+            elif isinstance(value, list):
+                value = list(value)  # e.g. ATR window - never share it with the copy
+            snap[name] = value
+        return snap
+
+    @classmethod
+    def from_snapshot(cls, snap: dict):
+        state = cls(**{name: snap[name] for name in cls.params})
+        for name in cls.fields:
+            current = getattr(state, name)
+            value = snap[name]
+            if isinstance(current, StreamingIndicator):
+                value = type(current).from_snapshot(value)
+            elif isinstance(value, list):
+                value = list(value)
+            setattr(state, name, value)
+        return state
+
+    @classmethod
+    def from_series(cls, bars, **params):
+        """Seed a state from historical bars (oldest first)"""
+        state = cls(**params)
+        for bar in bars:
+            state.update(bar)
+        return state
+
+    def preview(self, bar):
+        """Value the indicator would have if `bar` closed now, without advancing the state"""
+        return self.from_snapshot(self.snapshot()).update(bar)
+
+
+class EMAState(StreamingIndicator):
+    kind = 'ema'
+    params = ('span',)
+    fields = ('value', 'count')
+
+    def __init__(self, span: int):
+        self.span = span
+        self.value = None
+        self.count = 0
+
+    def update(self, close: float) -> float:
+        close = float(close)
+        if self.value is None:
+            self.value = close
+        else:
+            self.value += (2.0 / (self.span + 1.0)) * (close - self.value)
+        self.count += 1
+        return self.value
+
+
+class RSIState(StreamingIndicator):
+    kind = 'rsi'
+    params = ('period',)
+    fields = ('prev_close', 'avg_gain', 'avg_loss', 'count')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.count = 0
+
+    @property
+    def value(self):
+        if self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else float('nan')
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+    def update(self, close: float) -> float:
+        close = float(close)
+        # The first bar has no change and counts as zero gain / zero loss, like rsi()
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if self.avg_gain is None:
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            alpha = 1.0 / self.period
+            self.avg_gain += alpha * (gain - self.avg_gain)
+            self.avg_loss += alpha * (loss - self.avg_loss)
+        self.prev_close = close
+        self.count += 1
+        return self.value
+
+
+class MACDState(StreamingIndicator):
+    kind = 'macd'
+    params = ('fast', 'slow', 'signal')
+    fields = ('fast_ema', 'slow_ema', 'signal_ema', 'prev_macd', 'prev_signal')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.fast_ema = EMAState(fast)
+        self.slow_ema = EMAState(slow)
+        self.signal_ema = EMAState(signal)
+        self.prev_macd = None
+        self.prev_signal = None
+
+    @property
+    def value(self):
+        if self.signal_ema.value is None:
+            return None
+        macd_line = self.fast_ema.value - self.slow_ema.value
+        return self._result(macd_line, self.signal_ema.value)
+
+    def _result(self, macd_line, signal_line):
+        crossover = 'neutral'
+        if self.prev_macd is not None:
+            if self.prev_macd <= self.prev_signal and macd_line > signal_line:
+                crossover = 'bullish_cross'
+            elif self.prev_macd >= self.prev_signal and macd_line < signal_line:
+                crossover = 'bearish_cross'
+        return {
+            'macd_line': macd_line,
+            'signal_line': signal_line,
+            'histogram': macd_line - signal_line,
+            'crossover': crossover
+        }
+
+    def update(self, close: float) -> dict:
+        if self.signal_ema.value is not None:
+            self.prev_macd = self.fast_ema.value - self.slow_ema.value
+            self.prev_signal = self.signal_ema.value
+        macd_line = self.fast_ema.update(close) - self.slow_ema.update(close)
+        return self._result(macd_line, self.signal_ema.update(macd_line))
+
+
+class ATRState(StreamingIndicator):
+    """Rolling-mean ATR like atr(); bars are (high, low, close) or Candle-like objects"""
+    kind = 'atr'
+    params = ('period',)
+    fields = ('prev_close', 'ranges')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.ranges = []  # last `period` true ranges
+
+    @property
+    def value(self):
+        if len(self.ranges) < self.period:
+            return None
+        return sum(self.ranges) / self.period
+
+    def update(self, bar) -> float:
+        if hasattr(bar, 'close'):
+            high, low, close = bar.high, bar.low, bar.close
+        else:
+            high, low, close = bar
+        high, low, close = float(high), float(low), float(close)
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.ranges.append(tr)
+        if len(self.ranges) > self.period:
+            del self.ranges[0]
+        self.prev_close = close
+        return self.value
+
+
+class IndicatorSet(StreamingIndicator):
+    """
+    EMA20/50, RSI14, MACD and ATR14 advanced together over closed candles of one
+    series. advance() takes the full (n, 6) [ts, o, h, l, c, v] candle array (or
+    CandleArray) and
+    only applies the closed bars it has not seen yet; the last (still forming)
+    bar is only ever previewed.
+    """
+    kind = 'indicator_set'
+    params = ()
+    fields = ('ema20', 'ema50', 'rsi14', 'macd', 'atr14', 'last_ts')
+
+    def __init__(self):
+        self.ema20 = EMAState(20)
+        self.ema50 = EMAState(50)
+        self.rsi14 = RSIState(14)
+        self.macd = MACDState()
+        self.atr14 = ATRState(14)
+        self.last_ts = None
+
+    def update(self, row) -> dict:
+        if isinstance(row, Candle):
+            row = (row.ts, row.open, row.high, row.low, row.close)
+        ts, _, high, low, close = row[:5]
+        self.ema20.update(close)
+        self.ema50.update(close)
+        self.rsi14.update(close)
+        self.macd.update(close)
+        self.atr14.update((high, low, close))
+        self.last_ts = float(ts)
+        return self.values()
+
+    def advance(self, rows):
+        rows = rows.data if isinstance(rows, CandleArray) else np.asarray(rows, dtype=np.float64)
+        closed = rows[:-1]
+        if not len(closed):
+            return self
+        if self.last_ts is None or closed[0, 0] > self.last_ts or closed[-1, 0] < self.last_ts:
+            # First use, a gap, or a series that doesn't extend ours: reseed from what we have
+            self.__init__()
+            new = closed
+        else:
+            # Bars are in time order: skip the ones already folded in without a scan
+            new = closed[np.searchsorted(closed[:, 0], self.last_ts, side='right'):]
+        for row in new:
+            self.update(row)
+        return self
+
+    def values(self, live_row=None) -> dict:
+        state = self.from_snapshot(self.snapshot()) if live_row is not None else self
+        if live_row is not None:
+            state.update(live_row)
+        macd_data = state.macd.value or {}
+        return {
+            'ema_20': state.ema20.value,
+            'ema_50': state.ema50.value,
+            'rsi_14': state.rsi14.value,
+            'macd_histogram': macd_data.get('histogram'),
+            'macd_crossover': macd_data.get('crossover', 'neutral'),
+            'atr_14': state.atr14.value,
+        }
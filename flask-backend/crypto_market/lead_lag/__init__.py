@@ -1,2 +1,6 @@
-from .granger import GrangerResult, granger_causality_test, find_granger_causal_indicators
+from .granger import (
+    GrangerResult, granger_causality_test, find_granger_causal_indicators,
+    granger_batch, granger_matrix, lead_lag_table, rank_leading_indicators,
+)
+from .rolling import rolling_granger, rolling_granger_matrix
 from .data_fetcher import DataSource, MARKET_SOURCES, fetch_yfinance_data, fetch_all_data
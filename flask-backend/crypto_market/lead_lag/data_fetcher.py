@@ -2,11 +2,24 @@
 # -*- coding: utf-8 -*-
 """
 Lead-Lag Analysis - Data Fetcher Module
+
+Daily closes are kept in an on-disk store, one .npy file per ticker, so
+yfinance is only asked for what is missing: the history before the stored
+range and the last few days (whose latest bar may still have been forming).
+When yfinance is unreachable the stored history is used as is. Derived
+MoM/3M/YoY columns are recomputed only for periods that changed since the
+previous call in this process.
 """
+import json
 import logging
-from datetime import datetime
-from typing import List, Optional
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 
 logging.basicConfig(level=logging.INFO)
@@ -37,7 +50,106 @@ MARKET_SOURCES = [
 ]
 
 
-def fetch_yfinance_data(sources: List[DataSource], start_date: str, end_date: str) -> pd.DataFrame:
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'lead_lag'
+)
+REFRESH_AFTER = int(os.getenv('LEAD_LAG_REFRESH_SECONDS', str(6 * 3600)))  # stored series age before a top-up
+REFETCH_DAYS = 7  # days re-downloaded at the end of a stored series
+
+PRICE_COLS = ['BTC', 'ETH', 'SPY', 'QQQ', 'DXY', 'GOLD', 'TLT', 'OIL', 'VIX', 'TNX']
+DERIVATIVE_PERIODS = [('MoM', 1), ('YoY', 12), ('3M', 3)]
+
+
+class SeriesStore:
+    """
+    On-disk daily close history: float64 (n, 2) [day_ms, close] per ticker,
+    plus an index of the earliest date each ticker has been requested from
+    (so symbols listed after that date aren't re-requested forever).
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv('LEAD_LAG_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.enabled = os.getenv('LEAD_LAG_CACHE_DISABLED', '').lower() not in ('1', 'true', 'yes')
+        self._lock = threading.Lock()
+
+    def _path(self, ticker):
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9]+', '-', ticker) + '.npy')
+
+    def _index_path(self):
+        return os.path.join(self.root, 'index.json')
+
+    def _read_index(self) -> Dict[str, int]:
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def covered_from(self, ticker) -> Optional[pd.Timestamp]:
+        ms = self._read_index().get(ticker)
+        return pd.Timestamp(ms, unit='ms') if ms is not None else None
+
+    def read(self, ticker) -> Optional[pd.Series]:
+        if not self.enabled:
+            return None
+        try:
+            arr = np.load(self._path(ticker))
+        except OSError:
+            return None
+        except Exception as e:
+            logger.warning(f"Lead-lag cache read failed for {ticker}: {e}")
+            return None
+        if arr.ndim != 2 or arr.shape[1] != 2 or not len(arr):
+            return None
+        return pd.Series(arr[:, 1], index=pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'))
+
+    def modified_at(self, ticker) -> float:
+        try:
+            return os.path.getmtime(self._path(ticker))
+        except OSError:
+            return 0.0
+
+    def write(self, ticker, series: pd.Series, covered_from: Optional[pd.Timestamp] = None):
+        """Merge `series` into the stored history (new values win on overlapping dates)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                stored = self.read(ticker)
+                series = series.dropna()
+                if stored is not None and len(series):
+                    keep = stored[(stored.index < series.index[0]) | (stored.index > series.index[-1])]
+                    series = pd.concat([keep, series]).sort_index()
+                elif stored is not None:
+                    series = stored
+
+                os.makedirs(self.root, exist_ok=True)
+                path = self._path(ticker)
+                arr = np.column_stack([series.index.as_unit('ms').asi8, series.to_numpy(dtype=np.float64)])
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, arr.astype(np.float64))
+                os.replace(tmp_path, path)
+
+                if covered_from is not None:
+                    index = self._read_index()
+                    ms = int(covered_from.value // 1_000_000)
+                    index[ticker] = min(index.get(ticker, ms), ms)
+                    tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'w') as f:
+                        json.dump(index, f)
+                    os.replace(tmp_path, self._index_path())
+            except Exception as e:
+                # Read-only filesystems (e.g. serverless) just run without the cache
+                logger.warning(f"Lead-lag cache write failed for {ticker}, disabling cache: {e}")
+                self.enabled = False
+
+
+series_store = SeriesStore()
+
+
+def _download_closes(sources: List[DataSource], start_date: str, end_date: str) -> pd.DataFrame:
+    """Daily closes from yfinance, one column per source name"""
     try:
         import yfinance as yf
     except ImportError:
@@ -53,12 +165,12 @@ def fetch_yfinance_data(sources: List[DataSource], start_date: str, end_date: st
             return pd.DataFrame()
         
         if 'Close' in data.columns:
-            if len(tickers) == 1:
-                result = data['Close'].to_frame()
-                result.columns = names
-            else:
-                result = data['Close'].copy()
-                result.columns = names
+            close = data['Close']
+            if isinstance(close, pd.Series):
+                close = close.to_frame(tickers[0])
+            # yfinance orders the columns by ticker, not by request
+            result = close.reindex(columns=tickers)
+            result.columns = names
         else:
             result = data
         
@@ -69,6 +181,107 @@ def fetch_yfinance_data(sources: List[DataSource], start_date: str, end_date: st
         return pd.DataFrame()
 
 
+def fetch_yfinance_data(sources: List[DataSource], start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Daily closes for [start_date, end_date), one column per source name,
+    through the on-disk store: only missing ranges are downloaded.
+    """
+    if not series_store.enabled:
+        return _download_closes(sources, start_date, end_date)
+
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    now = time.time()
+
+    # Group the tickers that need the same download window into one request
+    plan: Dict[pd.Timestamp, List[DataSource]] = {}
+    for src in sources:
+        stored = series_store.read(src.ticker)
+        covered = series_store.covered_from(src.ticker)
+        if stored is None or covered is None or covered > start:
+            fetch_from = start
+        elif now - series_store.modified_at(src.ticker) < REFRESH_AFTER or stored.index[-1] >= end - timedelta(days=1):
+            continue
+        else:
+            fetch_from = max(start, stored.index[-1] - timedelta(days=REFETCH_DAYS))
+        plan.setdefault(fetch_from, []).append(src)
+
+    for fetch_from, group in plan.items():
+        downloaded = _download_closes(group, fetch_from.strftime("%Y-%m-%d"), end_date)
+        if downloaded.empty:
+            logger.warning(f"No fresh data for {[s.ticker for s in group]}, using the stored history")
+            continue
+        for src in group:
+            if src.name not in downloaded.columns:
+                continue
+            series = downloaded[src.name].dropna()
+            series.index = pd.DatetimeIndex(series.index).tz_localize(None)
+            series_store.write(src.ticker, series, covered_from=fetch_from if fetch_from == start else None)
+
+    columns = {}
+    for src in sources:
+        stored = series_store.read(src.ticker)
+        if stored is not None:
+            columns[src.name] = stored[(stored.index >= start) & (stored.index < end)]
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns)[[s.name for s in sources if s.name in columns]]
+
+
+def _first_changed_row(previous: pd.DataFrame, current: pd.DataFrame) -> Optional[int]:
+    """First row position where `current` differs from `previous` (None if identical)"""
+    if list(previous.columns) != list(current.columns):
+        return 0
+    n = min(len(previous), len(current))
+    if not previous.index[:n].equals(current.index[:n]):
+        return 0
+    a = previous.iloc[:n].to_numpy(dtype=np.float64)
+    b = current.iloc[:n].to_numpy(dtype=np.float64)
+    same = ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+    changed = np.flatnonzero(~same)
+    if len(changed):
+        return int(changed[0])
+    return n if len(previous) != len(current) else None
+
+
+def add_derivatives(base: pd.DataFrame, previous: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    `base` plus {col}_MoM / _YoY / _3M percent changes of the price columns.
+    With `previous` = (base, result) of an earlier call, rows before the first
+    changed period are reused and only the changed tail is recomputed.
+    """
+    first = 0
+    if previous is not None:
+        first = _first_changed_row(previous[0], base)
+        if first is None:
+            return previous[1].copy()
+
+    # pct_change(12) of row i reads row i-12; keep a margin for gap padding too
+    margin = 2 * max(period for _, period in DERIVATIVE_PERIODS)
+    offset = max(0, first - margin)
+    window = base.iloc[offset:]
+
+    derivative_cols = {}
+    for col in PRICE_COLS:
+        if col in window.columns:
+            for suffix, period in DERIVATIVE_PERIODS:
+                derivative_cols[f'{col}_{suffix}'] = window[col].pct_change(period) * 100
+
+    tail = window.copy()
+    for col_name, series in derivative_cols.items():
+        tail[col_name] = series
+    tail = tail.iloc[first - offset:]
+
+    if first == 0:
+        return tail
+    return pd.concat([previous[1].iloc[:first], tail])
+
+
+# (start_date, resample) -> (resampled closes, closes + derivatives) of the last call
+_derivative_memo: Dict[tuple, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+_derivative_lock = threading.Lock()
+
+
 def fetch_all_data(
     start_date: str = "2018-01-01",
     end_date: str = None,
@@ -86,22 +299,18 @@ def fetch_all_data(
     combined = market_df
     
     if resample == "monthly":
-        combined = combined.resample('M').last()
+        combined = combined.resample('ME').last()  # month end ('M' is deprecated)
     elif resample == "weekly":
         combined = combined.resample('W').last()
     
     if include_derivatives:
-        derivative_cols = {}
-        
-        price_cols = ['BTC', 'ETH', 'SPY', 'QQQ', 'DXY', 'GOLD', 'TLT', 'OIL', 'VIX', 'TNX']
-        for col in price_cols:
-            if col in combined.columns:
-                derivative_cols[f'{col}_MoM'] = combined[col].pct_change(1) * 100
-                derivative_cols[f'{col}_YoY'] = combined[col].pct_change(12) * 100
-                derivative_cols[f'{col}_3M'] = combined[col].pct_change(3) * 100
-        
-        for col_name, series in derivative_cols.items():
-            combined[col_name] = series
+        key = (start_date, resample)
+        with _derivative_lock:
+            previous = _derivative_memo.get(key)
+        result = add_derivatives(combined, previous)
+        with _derivative_lock:
+            _derivative_memo[key] = (combined, result)
+        combined = result
     
     combined = combined.ffill().dropna()
     
@@ -2,10 +2,19 @@
 # -*- coding: utf-8 -*-
 """
 Lead-Lag Analysis - Granger Causality Module
+
+Self-contained ssr F-test (same numbers as statsmodels grangercausalitytests
+'ssr_ftest'): two least-squares fits per lag with NumPy and the F distribution
+tail from the regularized incomplete beta function, so the API does not need
+statsmodels/scipy at runtime.
 """
 import logging
-from typing import Dict, List, Optional
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +54,108 @@ class GrangerResult:
                 return f"{self.cause} does not Granger-cause {self.effect}"
 
 
+# ------------------------------------------------------------
+# F distribution tail (regularized incomplete beta)
+# ------------------------------------------------------------
+def _betacf(a: float, b: float, x: float, max_iter: int = 300, eps: float = 1e-15) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = 1.0
+    d = 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < eps:
+            break
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    front = math.exp(log_front)
+    # The continued fraction converges fast on this side; use symmetry otherwise
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def f_sf(f_stat: float, dfn: float, dfd: float) -> float:
+    """P(F > f_stat) for an F(dfn, dfd) distribution"""
+    if not np.isfinite(f_stat):
+        return 0.0 if f_stat > 0 else 1.0
+    if f_stat <= 0:
+        return 1.0
+    return betainc(dfd / 2.0, dfn / 2.0, dfd / (dfd + dfn * f_stat))
+
+
+# ------------------------------------------------------------
+# Granger ssr F-test
+# ------------------------------------------------------------
+def lag_matrix(series: np.ndarray, lag: int) -> np.ndarray:
+    """Columns series[t-1] .. series[t-lag] for t = lag .. n-1"""
+    n = len(series)
+    return np.column_stack([series[lag - k:n - k] for k in range(1, lag + 1)])
+
+
+def _ssr(y: np.ndarray, X: np.ndarray) -> float:
+    beta, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+    resid = y - X @ beta
+    return float(resid @ resid)
+
+
+def granger_ftest(effect: np.ndarray, cause: np.ndarray, lag: int) -> Tuple[float, float, int, int]:
+    """
+    Does `cause` help predict `effect` beyond effect's own `lag` lags?
+    Restricted model: effect ~ const + effect lags; unrestricted adds cause lags.
+    Returns (F, p_value, df_resid, lag) like statsmodels' ssr_ftest.
+    Raises ValueError when the test can't be computed (constant regressors, perfect fit).
+    """
+    effect = np.asarray(effect, dtype=np.float64)
+    cause = np.asarray(cause, dtype=np.float64)
+    y = effect[lag:]
+    const = np.ones((len(y), 1))
+    own = np.hstack([lag_matrix(effect, lag), const])
+    joint = np.hstack([lag_matrix(effect, lag), lag_matrix(cause, lag), const])
+
+    if (joint[:, :-1].max(axis=0) == joint[:, :-1].min(axis=0)).any():
+        raise ValueError("The x values include a column with constant values")
+    df_resid = len(y) - joint.shape[1]
+    if df_resid <= 0:
+        raise ValueError("Not enough observations for the lag order")
+
+    ssr_own = _ssr(y, own)
+    ssr_joint = _ssr(y, joint)
+    tss = float(((y - y.mean()) ** 2).sum())
+    if tss == 0 or ssr_joint == 0 or ssr_joint / tss < np.finfo(float).eps:
+        raise ValueError("The VAR has a perfect fit of the data")
+
+    f_stat = (ssr_own - ssr_joint) / ssr_joint / lag * df_resid
+    return f_stat, f_sf(f_stat, lag, df_resid), df_resid, lag
+
+
 def granger_causality_test(
     df: pd.DataFrame,
     cause_var: str,
@@ -52,14 +163,6 @@ def granger_causality_test(
     max_lag: int = 6,
     significance_level: float = 0.05
 ) -> GrangerResult:
-    try:
-        from statsmodels.tsa.stattools import grangercausalitytests
-    except ImportError:
-        return GrangerResult(
-            cause=cause_var, effect=effect_var, max_lag=max_lag,
-            best_lag=0, best_p_value=1.0, is_significant=False, all_lags={}
-        )
-    
     if cause_var not in df.columns or effect_var not in df.columns:
         return GrangerResult(
             cause=cause_var, effect=effect_var, max_lag=max_lag,
@@ -75,13 +178,12 @@ def granger_causality_test(
         )
     
     try:
-        results = grangercausalitytests(test_data, maxlag=max_lag, verbose=False)
+        effect = test_data[effect_var].to_numpy(dtype=np.float64)
+        cause = test_data[cause_var].to_numpy(dtype=np.float64)
         
         all_lags = {}
-        for lag, result in results.items():
-            f_test = result[0]['ssr_ftest']
-            f_stat = f_test[0]
-            p_value = f_test[1]
+        for lag in range(1, max_lag + 1):
+            f_stat, p_value, _, _ = granger_ftest(effect, cause, lag)
             
             all_lags[lag] = {
                 "f_statistic": round(f_stat, 4),
@@ -106,6 +208,180 @@ def granger_causality_test(
         )
 
 
+# ------------------------------------------------------------
+# Batched engine: one target against many causes
+# ------------------------------------------------------------
+def lagged_columns(values: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Lags 1..max_lag of the last axis, laid out as (..., n, max_lag) with NaN
+    before the start; lag L's design is [..., L:, :L], so every lag order is a
+    view of the same matrix.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    out = np.full(values.shape + (max_lag,), np.nan)
+    for k in range(1, max_lag + 1):
+        if k < n:
+            out[..., k:, k - 1] = values[..., :n - k]
+    return out
+
+
+def _batch_ftests(effect: np.ndarray, causes: np.ndarray, max_lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ssr F-tests of every row of `causes` (k, n) against `effect` (n,) for lags 1..max_lag.
+
+    Per lag the restricted model (effect lags + const) is fitted once and
+    shared: by Frisch-Waugh-Lovell the unrestricted SSR is the restricted
+    residual minus its projection on the cause lags residualized against the
+    restricted design, which is one stacked QR for all causes.
+    Returns (F, p) arrays of shape (k, max_lag), NaN where the test is infeasible.
+    """
+    k, n = causes.shape
+    f_stats = np.full((k, max_lag), np.nan)
+    p_values = np.full((k, max_lag), np.nan)
+    effect_lags = lagged_columns(effect, max_lag)
+    cause_lags = lagged_columns(causes, max_lag)
+
+    for lag in range(1, max_lag + 1):
+        y = effect[lag:]
+        df_resid = len(y) - (2 * lag + 1)
+        own_lags = effect_lags[lag:, :lag]
+        if df_resid <= 0 or (np.ptp(own_lags, axis=0) == 0).any():
+            continue
+
+        own = np.hstack([own_lags, np.ones((len(y), 1))])
+        q_own, _ = np.linalg.qr(own)
+        resid = y - q_own @ (q_own.T @ y)
+        ssr_own = float(resid @ resid)
+        tss = float(((y - y.mean()) ** 2).sum())
+
+        x = cause_lags[:, lag:, :lag]                                   # (k, m, lag)
+        feasible = (np.ptp(x, axis=1) > 0).all(axis=1)
+        x_resid = x - np.einsum('mj,kjl->kml', q_own, np.einsum('mj,kml->kjl', q_own, x))
+        q_x, r_x = np.linalg.qr(x_resid)
+        explained = (np.einsum('kml,m->kl', q_x, resid) ** 2).sum(axis=1)
+        ssr_joint = ssr_own - explained
+
+        # Cause lags (nearly) collinear with the effect lags: fit those directly
+        diag = np.abs(np.diagonal(r_x, axis1=1, axis2=2))
+        scale = np.linalg.norm(x, axis=1).max(axis=1)
+        for i in np.flatnonzero(feasible & (diag.min(axis=1) < scale * 1e-10)):
+            joint = np.hstack([own_lags, x[i], np.ones((len(y), 1))])
+            ssr_joint[i] = _ssr(y, joint)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            feasible &= (tss > 0) & (ssr_joint > 0) & (ssr_joint / tss >= np.finfo(float).eps)
+            f_lag = (ssr_own - ssr_joint) / ssr_joint / lag * df_resid
+        for i in np.flatnonzero(feasible):
+            f_stats[i, lag - 1] = f_lag[i]
+            p_values[i, lag - 1] = f_sf(f_lag[i], lag, df_resid)
+
+    return f_stats, p_values
+
+
+def granger_batch(
+    df: pd.DataFrame,
+    effect_var: str,
+    causes: Optional[List[str]] = None,
+    max_lag: int = 6,
+    significance_level: float = 0.05
+) -> Dict[str, GrangerResult]:
+    """
+    granger_causality_test(df, cause, effect_var) for every cause in one pass.
+    Causes with the same missing-value pattern share one sample, so the
+    effect's lag matrices and restricted fits are built once per pattern.
+    Results are identical to the one-pair function.
+    """
+    if causes is None:
+        causes = [c for c in df.columns if c != effect_var]
+    causes = [c for c in dict.fromkeys(causes) if c != effect_var]
+
+    def empty(cause):
+        return GrangerResult(
+            cause=cause, effect=effect_var, max_lag=max_lag,
+            best_lag=0, best_p_value=1.0, is_significant=False, all_lags={}
+        )
+
+    results = {cause: empty(cause) for cause in causes}
+    if effect_var not in df.columns:
+        return results
+
+    effect_all = df[effect_var].to_numpy(dtype=np.float64)
+    groups: Dict[bytes, List[str]] = {}
+    masks: Dict[bytes, np.ndarray] = {}
+    for cause in causes:
+        if cause not in df.columns:
+            continue
+        mask = ~np.isnan(effect_all) & ~np.isnan(df[cause].to_numpy(dtype=np.float64))
+        groups.setdefault(mask.tobytes(), []).append(cause)
+        masks[mask.tobytes()] = mask
+
+    for key, members in groups.items():
+        mask = masks[key]
+        if mask.sum() < max_lag * 3:
+            continue
+        try:
+            effect = effect_all[mask]
+            cause_matrix = np.vstack([df[c].to_numpy(dtype=np.float64)[mask] for c in members])
+            f_stats, p_values = _batch_ftests(effect, cause_matrix, max_lag)
+        except Exception as e:
+            logger.error(f"Granger batch failed for {effect_var}: {e}")
+            continue
+
+        for i, cause in enumerate(members):
+            if np.isnan(p_values[i]).any():
+                continue  # some lag order can't be tested: same as the one-pair failure
+            all_lags = {
+                lag: {
+                    "f_statistic": round(float(f_stats[i, lag - 1]), 4),
+                    "p_value": round(float(p_values[i, lag - 1]), 4),
+                    "is_significant": bool(p_values[i, lag - 1] < significance_level)
+                }
+                for lag in range(1, max_lag + 1)
+            }
+            best_lag = min(all_lags.keys(), key=lambda k: all_lags[k]['p_value'])
+            best_p = all_lags[best_lag]['p_value']
+            results[cause] = GrangerResult(
+                cause=cause, effect=effect_var, max_lag=max_lag,
+                best_lag=best_lag, best_p_value=best_p,
+                is_significant=best_p < significance_level, all_lags=all_lags
+            )
+
+    return results
+
+
+def granger_matrix(
+    df: pd.DataFrame,
+    variables: Optional[List[str]] = None,
+    max_lag: int = 6,
+    significance_level: float = 0.05,
+    max_workers: Optional[int] = None
+) -> Dict[str, Dict[str, GrangerResult]]:
+    """
+    Full N x N lead-lag matrix: {effect: {cause: GrangerResult}} over `variables`
+    (default: every column). Each effect is one granger_batch job; jobs run on a
+    thread pool since the NumPy linear algebra releases the GIL.
+    """
+    if variables is None:
+        variables = list(df.columns)
+    variables = [v for v in dict.fromkeys(variables) if v in df.columns]
+    workers = max_workers or min(len(variables), os.cpu_count() or 1) or 1
+
+    def run(effect):
+        return effect, granger_batch(df, effect, variables, max_lag, significance_level)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(run, variables))
+
+
+def lead_lag_table(matrix: Dict[str, Dict[str, GrangerResult]], field: str = "best_p_value") -> pd.DataFrame:
+    """granger_matrix result -> DataFrame (rows: cause, columns: effect) of one GrangerResult field"""
+    return pd.DataFrame({
+        effect: {cause: getattr(result, field) for cause, result in row.items()}
+        for effect, row in matrix.items()
+    })
+
+
 def find_granger_causal_indicators(
     df: pd.DataFrame,
     target: str,
@@ -115,19 +391,42 @@ def find_granger_causal_indicators(
     if variables is None:
         variables = [c for c in df.columns if c != target]
     
-    significant_results = []
-    
-    for var in variables:
-        if var == target:
-            continue
-        
-        try:
-            result = granger_causality_test(df, var, target, max_lag)
-            if result.is_significant:
-                significant_results.append(result)
-        except Exception as e:
-            logger.warning(f"Failed to test {var}: {e}")
-    
+    results = granger_batch(df, target, variables, max_lag)
+    significant_results = [r for r in results.values() if r.is_significant]
     significant_results.sort(key=lambda r: r.best_p_value)
     
     return significant_results
+
+
+def rank_leading_indicators(
+    df: pd.DataFrame,
+    target: str,
+    variables: Optional[List[str]] = None,
+    max_lag: int = 6,
+    top: int = 10
+) -> List[dict]:
+    """
+    The `top` candidate causes of `target` by best-lag p-value (significant or not),
+    with the F statistic and the correlation at the best lag.
+    """
+    results = granger_batch(df, target, variables, max_lag)
+    ranked = sorted((r for r in results.values() if r.best_lag), key=lambda r: r.best_p_value)[:top]
+
+    indicators = []
+    for r in ranked:
+        try:
+            # cause `lag` periods earlier against the target now
+            corr = df[r.cause].shift(r.best_lag).corr(df[target])
+            corr_val = float(corr) if not pd.isna(corr) else 0.0
+        except Exception:
+            corr_val = 0.0
+        indicators.append({
+            'variable': r.cause,
+            'lag': int(r.best_lag),
+            'p_value': float(r.best_p_value),
+            'f_statistic': float(r.all_lags[r.best_lag]['f_statistic']),
+            'correlation': corr_val,
+            'is_significant': bool(r.is_significant),
+            'interpretation': r.get_interpretation(),
+        })
+    return indicators
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lead-Lag Analysis - Rolling / Expanding Window Granger Causality
+
+The static test answers "does X lead Y over the whole history"; this module
+answers it for every window of a rolling (or expanding) scan, so regime
+changes show up as a time series of p-values and best lags.
+
+Every regression the F-test needs is a sub-block of one cross-product
+matrix of [y_t, y lags, x lags, 1]. Those sufficient statistics (X'X, X'y,
+y'y) are accumulated in a single pass as running sums; a window's
+statistics are the running sum at its end minus the running sum at its
+start (the rows that slid in minus the rows that slid out), so no window is
+ever refitted from the raw data. Each window and lag order uses exactly the
+sample granger_ftest would use on the window's rows.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .granger import f_sf
+
+
+def _design_rows(effect: np.ndarray, cause: np.ndarray, max_lag: int) -> np.ndarray:
+    """Rows [y_t, y_{t-1..t-max_lag}, x_{t-1..t-max_lag}, 1]; lags before the start are 0 (never used)"""
+    n = len(effect)
+    rows = np.zeros((n, 2 * max_lag + 2))
+    rows[:, 0] = effect
+    for k in range(1, max_lag + 1):
+        rows[k:, k] = effect[:n - k]
+        rows[k:, max_lag + k] = cause[:n - k]
+    rows[:, -1] = 1.0
+    return rows
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    # The F statistic is invariant to affine rescaling of either series; centering
+    # keeps the running-sum differences well conditioned for price levels.
+    std = values.std()
+    return (values - values.mean()) / (std if std > 0 else 1.0)
+
+
+def _window_ssr(stats: np.ndarray, idx: List[int]) -> np.ndarray:
+    """SSR of y on the columns `idx` for a stack of (d, d) cross-product matrices"""
+    xtx = stats[:, idx][:, :, idx]
+    xty = stats[:, idx, 0]
+    beta = np.einsum('wij,wj->wi', np.linalg.pinv(xtx, rcond=1e-12), xty)
+    return stats[:, 0, 0] - np.einsum('wi,wi->w', xty, beta)
+
+
+def rolling_granger(
+    df: pd.DataFrame,
+    cause_var: str,
+    effect_var: str,
+    max_lag: int = 6,
+    window: Optional[int] = 36,
+    min_periods: Optional[int] = None,
+    significance_level: float = 0.05
+) -> pd.DataFrame:
+    """
+    Granger ssr F-test of cause -> effect over sliding windows of `window` rows
+    (window=None: expanding windows from the start of the data).
+    Rows are the pair's non-missing observations, as in granger_causality_test.
+
+    Returns a DataFrame indexed by each window's last date with columns
+    best_lag, best_p_value, is_significant and p_lag_1..p_lag_{max_lag}
+    (NaN where the test can't be computed for that window and lag).
+    """
+    columns = ['best_lag', 'best_p_value', 'is_significant'] + [f'p_lag_{lag}' for lag in range(1, max_lag + 1)]
+    if cause_var not in df.columns or effect_var not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    data = df[[effect_var, cause_var]].dropna()
+    n = len(data)
+    if min_periods is None:
+        min_periods = window if window else max_lag * 3
+    min_periods = max(min_periods, max_lag * 3)
+    if n < min_periods:
+        return pd.DataFrame(columns=columns)
+
+    rows = _design_rows(
+        _standardize(data[effect_var].to_numpy(dtype=np.float64)),
+        _standardize(data[cause_var].to_numpy(dtype=np.float64)),
+        max_lag
+    )
+    # Running sums of the per-row cross products: running[t] = sum of rows[:t]
+    d = rows.shape[1]
+    running = np.zeros((n + 1, d, d))
+    np.cumsum(np.einsum('ti,tj->tij', rows, rows), axis=0, out=running[1:])
+
+    ends = np.arange(min_periods, n + 1)                       # window = rows[start:end]
+    starts = ends - window if window else np.zeros_like(ends)
+    starts = np.maximum(starts, 0)
+
+    const = d - 1
+    p_values = np.full((len(ends), max_lag), np.nan)
+    for lag in range(1, max_lag + 1):
+        stats = running[ends] - running[starts + lag]          # rows start+lag .. end-1
+        m = ends - starts - lag
+        df_resid = m - (2 * lag + 1)
+
+        own = list(range(1, lag + 1)) + [const]
+        joint = list(range(1, lag + 1)) + list(range(max_lag + 1, max_lag + lag + 1)) + [const]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = stats[:, const, :] / m[:, None]
+            variances = np.diagonal(stats, axis1=1, axis2=2) / m[:, None] - means ** 2
+            tss = stats[:, 0, 0] - stats[:, 0, const] ** 2 / m
+            ssr_own = _window_ssr(stats, own)
+            ssr_joint = _window_ssr(stats, joint)
+            f_stats = (ssr_own - ssr_joint) / ssr_joint / lag * df_resid
+
+        lag_cols = joint[:-1]
+        feasible = (
+            (df_resid > 0)
+            & (variances[:, lag_cols] > 1e-10).all(axis=1)     # no constant regressor
+            & (tss > 0) & (ssr_joint > 0)
+            & (ssr_joint / tss >= np.finfo(float).eps)       # no perfect fit
+        )
+        for w in np.flatnonzero(feasible):
+            p_values[w, lag - 1] = f_sf(float(f_stats[w]), lag, int(df_resid[w]))
+
+    out = pd.DataFrame(p_values, index=data.index[ends - 1], columns=columns[3:])
+    testable = ~np.isnan(p_values).all(axis=1)
+    best = np.where(testable, np.nanargmin(np.where(np.isnan(p_values), np.inf, p_values), axis=1), -1)
+    out.insert(0, 'best_lag', np.where(testable, best + 1, 0))
+    out.insert(1, 'best_p_value', np.where(testable, p_values[np.arange(len(ends)), best], 1.0))
+    out.insert(2, 'is_significant', out['best_p_value'] < significance_level)
+    return out
+
+
+def rolling_granger_matrix(
+    df: pd.DataFrame,
+    variables: Optional[List[str]] = None,
+    target: Optional[str] = None,
+    max_lag: int = 6,
+    window: Optional[int] = 36,
+    min_periods: Optional[int] = None,
+    significance_level: float = 0.05,
+    max_workers: Optional[int] = None
+) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    rolling_granger for every (cause, effect) pair of `variables` (default: all
+    columns), or only the pairs into `target` when given. Pairs run on a thread pool.
+    """
+    if variables is None:
+        variables = list(df.columns)
+    variables = [v for v in dict.fromkeys(variables) if v in df.columns]
+    effects = [target] if target else variables
+    pairs = [(cause, effect) for effect in effects for cause in variables if cause != effect]
+    if not pairs:
+        return {}
+    workers = max_workers or min(len(pairs), os.cpu_count() or 1)
+
+    def run(pair):
+        cause, effect = pair
+        return pair, rolling_granger(df, cause, effect, max_lag, window, min_periods, significance_level)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(run, pairs))
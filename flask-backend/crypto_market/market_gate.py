@@ -4,13 +4,28 @@
 Market Gate - 시장 건전성 평가 시스템 (100점 만점)
 """
 from __future__ import annotations
+import os
 from dataclasses import dataclass
-from typing import Dict, Tuple, List, Optional, Any
+from typing import Dict, Tuple, List, Optional, Any, Union
 import numpy as np
 import pandas as pd
 
-from .models import Candle
+from .models import Candle, CandleArray, as_candle_array
 from .indicators import ema, atr
+from . import batch_indicators as bi
+
+# Candle series may be CandleArray (zero-copy views of cached candles) or List[Candle]
+Candles = Union[CandleArray, List[Candle]]
+
+# Timeframes blended into the BTC trend / volatility / participation scores.
+# The 4h path reacts within hours; the daily path anchors the regime.
+TIMEFRAME_WEIGHTS = {"1d": 0.6, "4h": 0.4}
+BARS_PER_DAY = {"1d": 1, "4h": 6}
+GATE_4H_BARS = 250
+
+# Alt candles fetched for the breadth universe, and how long the gate waits for them
+BREADTH_BARS = 220
+BREADTH_TIME_BUDGET = float(os.getenv('BREADTH_TIME_BUDGET', '30'))
 
 
 @dataclass
@@ -21,10 +36,10 @@ class MarketGateResult:
     metrics: Dict[str, Any]
 
 
-def candles_to_df(candles: List[Candle]) -> pd.DataFrame:
-    df = pd.DataFrame([{
-        "ts": c.ts, "open": c.open, "high": c.high, "low": c.low, "close": c.close, "volume": c.volume
-    } for c in candles]).sort_values("ts").reset_index(drop=True)
+def candles_to_df(candles: Candles) -> pd.DataFrame:
+    df = as_candle_array(candles).to_df(["ts", "open", "high", "low", "close", "volume"])
+    if not df["ts"].is_monotonic_increasing:
+        df = df.sort_values("ts").reset_index(drop=True)
     return df
 
 
@@ -50,53 +65,53 @@ def slope_pct(series: pd.Series, lookback: int = 20) -> Optional[float]:
 
 
 def compute_alt_breadth_above_ema50(
-    candles_map: Dict[Tuple[str, str], List[Candle]],
+    candles_map: Dict[Tuple[str, str], Candles],
     symbols: List[str],
     timeframe: str = "1d",
     lookback: int = 220
 ) -> Optional[float]:
-    ok = 0
-    total = 0
-
+    """
+    Share of symbols closing above their EMA50 (None with fewer than 3 usable symbols).
+    Candles are expected oldest first; the last `lookback` closes of every
+    symbol are stacked into one matrix and the EMA runs over all of them at once.
+    """
+    closes = []
     for sym in symbols:
         c = candles_map.get((sym, timeframe))
         if not c or len(c) < 50:
             continue
-        df = candles_to_df(c)
-        close = df["close"]
-        e50 = ema(close, 50)
-        if pd.isna(e50.iloc[-1]):
-            continue
-        total += 1
-        if float(close.iloc[-1]) > float(e50.iloc[-1]):
-            ok += 1
+        closes.append(as_candle_array(c).close[-lookback:])
 
-    if total < 3:
+    if len(closes) < 3:
         return None
-    return ok / total
 
+    close = bi.stack_columns(closes)
+    e50 = bi.ema(close, 50)[:, -1]
+    last = close[:, -1]
+    valid = ~np.isnan(e50)
+    if valid.sum() < 3:
+        return None
+    return float((last[valid] > e50[valid]).mean())
 
-def evaluate_market_gate(
-    btc_candles_1d: List[Candle],
-    btc_candles_4h: List[Candle],
-    candles_map: Dict[Tuple[str, str], List[Candle]],
-    alt_symbols: List[str],
-    funding_rate: Optional[float] = None,
-    open_interest_delta_z: Optional[float] = None,
-) -> MarketGateResult:
-    reasons: List[str] = []
-    metrics: Dict[str, Any] = {}
 
-    if not btc_candles_1d or len(btc_candles_1d) < 200:
-        return MarketGateResult(
-            gate="RED", score=0,
-            reasons=["BTC 1D 데이터 부족"],
-            metrics={}
-        )
+def df_to_candles(df: pd.DataFrame) -> CandleArray:
+    """OHLCV DataFrame from MarketDataService (raw_df) -> CandleArray over the same memory"""
+    return CandleArray.from_df(df)
+
 
-    btc1 = candles_to_df(btc_candles_1d)
-    close = btc1["close"]
-    vol = btc1["volume"]
+def score_btc_timeframe(candles: Candles, timeframe: str = "1d") -> Tuple[Dict[str, float], Dict[str, Any], List[str]]:
+    """
+    BTC trend (0~35), volatility (0~18) and participation (0~18) scores of one timeframe.
+    ATR% thresholds are daily values scaled by sqrt(bars per day), so a 4h bar
+    is judged against the range a 4h bar normally has.
+    Returns (components, metrics, reasons); non-daily reasons are prefixed with the timeframe.
+    """
+    reasons: List[str] = []
+    atr_scale = 1.0 / np.sqrt(BARS_PER_DAY.get(timeframe, 1))
+
+    df = candles_to_df(candles)
+    close = df["close"]
+    vol = df["volume"]
 
     e50 = ema(close, 50)
     e200 = ema(close, 200)
@@ -107,17 +122,17 @@ def evaluate_market_gate(
     ema200_slope = slope_pct(e200, 20)
     vol_z = zscore_last(vol, 50)
 
-    a = atr(btc1, 14)
+    a = atr(df, 14)
     atrp = float(a.iloc[-1] / price * 100.0) if price > 0 else None
 
-    metrics.update({
-        "btc_price": price,
-        "btc_ema50": ema50,
-        "btc_ema200": ema200,
-        "btc_ema200_slope_pct_20": ema200_slope,
-        "btc_volume_z_50": vol_z,
-        "btc_atrp_14_pct": atrp,
-    })
+    metrics = {
+        "price": price,
+        "ema50": ema50,
+        "ema200": ema200,
+        "ema200_slope_pct_20": ema200_slope,
+        "volume_z_50": vol_z,
+        "atrp_14_pct": atrp,
+    }
 
     # 1) TREND (0~35점)
     trend = 0.0
@@ -143,11 +158,11 @@ def evaluate_market_gate(
     # 2) VOLATILITY (0~18점)
     vol_score = 0.0
     if atrp is not None:
-        if atrp <= 2.0:
+        if atrp <= 2.0 * atr_scale:
             vol_score = 18.0
-        elif atrp <= 3.5:
+        elif atrp <= 3.5 * atr_scale:
             vol_score = 14.0
-        elif atrp <= 5.0:
+        elif atrp <= 5.0 * atr_scale:
             vol_score = 8.0
             reasons.append("변동성 높음")
         else:
@@ -172,6 +187,53 @@ def evaluate_market_gate(
     else:
         part = 9.0
 
+    if timeframe != "1d":
+        reasons = [f"[{timeframe}] {r}" for r in reasons]
+    components = {"trend": trend, "volatility": vol_score, "participation": part}
+    return components, metrics, reasons
+
+
+def evaluate_market_gate(
+    btc_candles_1d: Candles,
+    btc_candles_4h: Candles,
+    candles_map: Dict[Tuple[str, str], Candles],
+    alt_symbols: List[str],
+    funding_rate: Optional[float] = None,
+    open_interest_delta_z: Optional[float] = None,
+) -> MarketGateResult:
+    reasons: List[str] = []
+    metrics: Dict[str, Any] = {}
+
+    if not btc_candles_1d or len(btc_candles_1d) < 200:
+        return MarketGateResult(
+            gate="RED", score=0,
+            reasons=["BTC 1D 데이터 부족"],
+            metrics={}
+        )
+
+    btc_1d = score_btc_timeframe(btc_candles_1d, "1d")
+    components, tf_metrics, tf_reasons = btc_1d
+    metrics.update({f"btc_{k}": v for k, v in tf_metrics.items()})
+    reasons.extend(tf_reasons)
+
+    # 4h path (blended in when there is enough history for its EMA200)
+    reasons_4h: List[str] = []
+    if btc_candles_4h is not None and len(btc_candles_4h) >= 200:
+        components_4h, metrics_4h, reasons_4h = score_btc_timeframe(btc_candles_4h, "4h")
+        metrics.update({f"btc_4h_{k}": v for k, v in metrics_4h.items()})
+        metrics["gate_timeframe_components"] = {
+            tf: {k: round(v, 1) for k, v in comps.items()}
+            for tf, comps in (("1d", components), ("4h", components_4h))
+        }
+        components = {
+            k: TIMEFRAME_WEIGHTS["1d"] * components[k] + TIMEFRAME_WEIGHTS["4h"] * components_4h[k]
+            for k in components
+        }
+
+    trend = components["trend"]
+    vol_score = components["volatility"]
+    part = components["participation"]
+
     # 4) BREADTH (0~18점)
     breadth_ratio = compute_alt_breadth_above_ema50(
         candles_map=candles_map,
@@ -234,6 +296,7 @@ def evaluate_market_gate(
     else:
         gate = "RED"
 
+    reasons.extend(reasons_4h)
     reasons = reasons[:5] if reasons else ["조건이 전반적으로 양호함"]
 
     return MarketGateResult(
@@ -248,7 +311,7 @@ def evaluate_market_gate(
 def run_market_gate_sync() -> MarketGateResult:
     """Flask API Sync Wrapper - Uses MarketDataService (CCXT)"""
     from market_provider import market_data_service
-    import requests
+    from http_client import http_client
     
     try:
         # 1. BTC 1D Data (via Binance CCXT)
@@ -259,14 +322,7 @@ def run_market_gate_sync() -> MarketGateResult:
             if raw_df is None or raw_df.empty or len(raw_df) < 200:
                 raise ValueError("Insufficient BTC Data")
                 
-            candles_1d = [Candle(
-                ts=int(row['timestamp']),
-                open=float(row['Open']),
-                high=float(row['High']),
-                low=float(row['Low']),
-                close=float(row['Close']),
-                volume=float(row['Volume'])
-            ) for idx, row in raw_df.iterrows()]
+            candles_1d = df_to_candles(raw_df)
             
         except Exception as e:
             return MarketGateResult(
@@ -274,57 +330,34 @@ def run_market_gate_sync() -> MarketGateResult:
                 reasons=[f"BTC 데이터 오류: {str(e)}"], metrics={}
             )
         
-        # 2. Altcoin Breadth (Approximate via Top 10 Listings)
-        # We don't have full history for all alts in one go without heavy API usage.
-        # We'll approximate Breadth using 'Trend' from get_asset_data for Top 10 Alts.
-        alt_tickers = ["ETH", "SOL", "BNB", "XRP", "ADA", "DOGE", "TRX", "DOT", "LINK", "AVAX"]
-        candles_map = {}
-        
-        # NOTE: Fetching 10 assets individually is slow-ish but reliable.
-        # In a real prod, we'd batch this. For now, max_workers=5 in ThreadPool could be better but let's keep it simple sync or pseudo.
-        
-        # Improvement: Just check their current price vs MA20/MA50 from get_asset_data summary
-        # But evaluate_market_gate expects candles_map.
-        # We will create a fake candle map with just enough info (Current Close & EMA50 proxy = MA20 provided by service)
+        # 1b. BTC 4H Data (closed bars; the candle cache only fetches bars new since the last run)
+        try:
+            candles_4h = market_data_service.get_candles("BTC", "4h", GATE_4H_BARS, closed_only=True)
+        except Exception as e:
+            print(f"[MarketGate] BTC 4h candles unavailable, scoring 1d only: {e}")
+            candles_4h = []
         
-        bad_breadth_count = 0
-        total_alts = 0
+        # 2. Altcoin Breadth (Close > EMA50 over the breadth universe)
+        # One batched fetch through the candle cache: a ticker snapshot plus
+        # concurrent candle requests for every alt; alts not ready within the
+        # time budget are simply left out of the ratio.
+        from crypto_market.universe import universe_manager
+        alt_tickers = [s for s in universe_manager.get_universe('breadth') if s != 'BTC']
+        alt_batch = market_data_service.get_assets_data(
+            alt_tickers, bars=BREADTH_BARS, time_budget=BREADTH_TIME_BUDGET
+        )
         
-        for sym in alt_tickers:
-            try:
-                d = market_data_service.get_asset_data(sym)
-                # Create a synthetic history where MA50 ~ MA20 logic or just rely on the 'trend' field
-                # If trend is "Bullish", we assume Close > MA20 (Proxy for MA50)
-                # This is a simplification to save API calls.
-                
-                price = d['current_price']
-                ma_val = d['ma_20'] # Proxy
-                
-                # Construct 2 candles: [One long ago for MA calc, One now]
-                # Actually, compute_alt_breadth checks Close > EMA50.
-                # We'll pass a 1-day DF where EMA50 calculation by 'ema' function (pandas ewm) works?
-                # No, standard EMA needs history.
-                
-                # Hack: We will inject a pre-calculated Breadth Ratio into metrics later 
-                # instead of letting evaluate_market_gate compute it fully if we lack history.
-                
-                if price > ma_val: # Bullish
-                    pass 
-                else: 
-                    bad_breadth_count += 1
-                total_alts += 1
-                
-            except:
-                continue
-                
-        # Manually compute breadth ratio proxy
-        breadth_ratio = 1.0 - (bad_breadth_count / total_alts) if total_alts > 0 else 0.5
+        candles_map = {}
+        for sym, d in alt_batch['results'].items():
+            df = d.get('raw_df')
+            if df is not None and not df.empty:
+                candles_map[(sym, "1d")] = df_to_candles(df)
         
         # 3. Funding Rate
         funding_rate = 0.0001
         try:
             # Try Binance Future API directly (public)
-            resp = requests.get("https://fapi.binance.com/fapi/v1/premiumIndex?symbol=BTCUSDT", timeout=3)
+            resp = http_client.get("https://fapi.binance.com/fapi/v1/premiumIndex?symbol=BTCUSDT", timeout=3)
             data = resp.json()
             if 'lastFundingRate' in data:
                 funding_rate = float(data['lastFundingRate'])
@@ -334,7 +367,7 @@ def run_market_gate_sync() -> MarketGateResult:
         # 4. Fear & Greed
         fng_index = 50
         try:
-            fng_resp = requests.get("https://api.alternative.me/fng/?limit=1", timeout=3)
+            fng_resp = http_client.get("https://api.alternative.me/fng/?limit=1", timeout=3)
             fng_data = fng_resp.json()
             if 'data' in fng_data:
                 fng_index = int(fng_data['data'][0]['value'])
@@ -342,54 +375,22 @@ def run_market_gate_sync() -> MarketGateResult:
             pass
         
         # Construct Result
-        # We use evaluate_market_gate for BTC metrics, but override Breadth
-        
         result = evaluate_market_gate(
             btc_candles_1d=candles_1d,
-            btc_candles_4h=[],
-            candles_map={}, # Empty map
-            alt_symbols=[],
+            btc_candles_4h=candles_4h,
+            candles_map=candles_map,
+            alt_symbols=[sym for sym, _ in candles_map],
             funding_rate=funding_rate,
         )
         
-        # OVERRIDE Breadth (Since we didn't provide candles map)
-        result.metrics["alt_breadth_above_ema50"] = breadth_ratio
-        
-        # Recalculate Score with new Breadth
-        # Breadth Score Logic:
-        breadth_score = 0.0
-        if breadth_ratio >= 0.65: breadth_score = 18.0
-        elif breadth_ratio >= 0.50: breadth_score = 12.0
-        elif breadth_ratio >= 0.35: breadth_score = 6.0
-        else: breadth_score = 2.0
-        
-        # Remove default '9.0' from breadth (which is added if map is empty)
-        base_score = result.score
-        # Re-sum components from metrics (safest)
-        comps = result.metrics['gate_score_components']
-        
-        # Update Components
-        comps['breadth'] = round(breadth_score, 1)
-        comps['participation'] = comps['participation'] # Keep
-        comps['trend'] = comps['trend'] # Keep
-        comps['volatility'] = comps['volatility'] # Keep
-        comps['leverage'] = comps['leverage'] # Keep
-        
-        new_total = sum(comps.values())
-        result.score = int(min(100, max(0, new_total)))
-        
         # Log breakdown
         import logging
         logger = logging.getLogger("MARKET_GATE")
-        logger.info(f"Market Gate Components: {comps} -> Total: {result.score}")
-        
-        # Update Gate Color
-        if result.score >= 72: result.gate = "GREEN"
-        elif result.score >= 48: result.gate = "YELLOW"
-        else: result.gate = "RED"
+        logger.info(f"Market Gate Components: {result.metrics.get('gate_score_components')} -> Total: {result.score}")
         
         # Update metrics
         result.metrics['fear_greed_index'] = fng_index
+        result.metrics['alt_breadth_universe'] = len(candles_map)
         
         return result
         
@@ -2,6 +2,13 @@
 from dataclasses import dataclass
 from typing import List
 
+import numpy as np
+import pandas as pd
+
+# Column layout of ccxt OHLCV rows and of MarketDataService raw_df frames
+OHLCV_COLUMNS = ['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
 @dataclass
 class Candle:
     ts: int       # timestamp (milliseconds)
@@ -10,3 +17,82 @@ class Candle:
     low: float
     close: float
     volume: float
+
+
+class CandleArray:
+    """
+    Candle series stored as one (n, 6) float64 [ts, open, high, low, close, volume]
+    array (the layout ccxt returns and the candle cache stores). Columns are
+    NumPy views, and wrapping a cached array or a raw_df built from one does
+    not copy the candle data. Indexing with an int gives a Candle, slicing
+    gives another CandleArray over the same memory.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        data = np.asarray(data, dtype=np.float64)
+        self.data = data.reshape(-1, 6) if data.ndim != 2 else data
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'CandleArray':
+        """raw_df (OHLCV_COLUMNS) -> CandleArray; a view when the frame is one float64 block"""
+        if list(df.columns) != OHLCV_COLUMNS:
+            df = df[OHLCV_COLUMNS]
+        return cls(df.to_numpy(dtype=np.float64, copy=False))
+
+    @classmethod
+    def from_candles(cls, candles: List[Candle]) -> 'CandleArray':
+        return cls([(c.ts, c.open, c.high, c.low, c.close, c.volume) for c in candles])
+
+    def to_df(self, columns=OHLCV_COLUMNS) -> pd.DataFrame:
+        """DataFrame view of the candles (no copy)"""
+        return pd.DataFrame(self.data, columns=list(columns), copy=False)
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.data[:, 4]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.data[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleArray(self.data[index])
+        ts, o, h, l, c, v = self.data[index]
+        return Candle(ts=int(ts), open=float(o), high=float(h), low=float(l), close=float(c), volume=float(v))
+
+    def __iter__(self):
+        for i in range(len(self.data)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"CandleArray({len(self)} candles)"
+
+
+def as_candle_array(candles) -> CandleArray:
+    """CandleArray, (n, 6) array or List[Candle] -> CandleArray"""
+    if isinstance(candles, CandleArray):
+        return candles
+    if isinstance(candles, list) and candles and isinstance(candles[0], Candle):
+        return CandleArray.from_candles(candles)
+    return CandleArray(candles)
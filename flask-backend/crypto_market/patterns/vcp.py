@@ -1,16 +1,98 @@
-
-import pandas as pd
+import os
+import time
 import numpy as np
 from datetime import datetime
 from market_provider import market_data_service
+from crypto_market.universe import universe_manager
+from crypto_market.indicators import pivot_mask
+from crypto_market import batch_indicators as bi
 
+MIN_BARS = 200       # SMA200 trend template needs this much history
+YEAR_BARS = 365
+BASE_WINDOW = 90     # bars searched for the base (contraction waves)
+PIVOT_WINDOW = 3     # bars on each side of a swing high
+MIN_WAVE_DEPTH = 1.0  # % - shallower pullbacks are noise, not contractions
+VCP_TIME_BUDGET = float(os.getenv('VCP_TIME_BUDGET', '60'))  # seconds for data acquisition
 
-import pandas as pd
-import numpy as np
-from datetime import datetime
-from market_provider import market_data_service
 
-def find_vcp_candidates(symbols):
+def trend_template(close, price):
+    """
+    Mark Minervini's Stage 2 criteria for every row of a (symbols x bars) close matrix.
+    Returns boolean arrays c1..c7 aligned with the rows.
+    """
+    with np.errstate(invalid='ignore'):
+        sma50 = bi.tail_mean(close, 50)
+        sma150 = bi.tail_mean(close, 150)
+        sma200_series = bi.sma(close, 200)
+        sma200 = sma200_series[:, -1]
+        # 200 SMA trending up: now vs one month (30 bars) ago
+        sma200_1m_ago = sma200_series[:, -31] if close.shape[1] > 30 else np.full(close.shape[0], np.nan)
+
+        # Symbols listed for less than a year use all the history they have
+        # (counted in the scan's partial_year stat)
+        year = close[:, -YEAR_BARS:]
+        low_52w = np.nanmin(year, axis=1)
+        high_52w = np.nanmax(year, axis=1)
+
+        return {
+            'c1': (price > sma150) & (price > sma200),
+            'c2': sma150 > sma200,
+            'c3': sma200 > sma200_1m_ago,
+            'c4': (sma50 > sma150) & (sma50 > sma200),
+            'c5': price > sma50,
+            'c6': price > low_52w * 1.30,  # At least 30% above 52w low
+            'c7': price > high_52w * 0.75,  # Within 25% of 52w high (Consolidating near highs)
+        }
+
+
+def contraction_waves(high, low, window=BASE_WINDOW, pivot_window=PIVOT_WINDOW):
+    """
+    Pullback waves (T1, T2, T3, ...) of the base for every row.
+
+    The base starts at the highest high of the last `window` bars; every swing
+    high after it opens a new wave whose depth is the drop to the lowest low
+    before the next swing high (the last wave runs to the latest bar).
+    Swing highs for the whole universe come from one pivot_mask call.
+    Returns per row: (wave start indices into the base window, depths in %).
+    """
+    base_high = high[:, -window:]
+    base_low = low[:, -window:]
+    swing_highs = pivot_mask(base_high, pivot_window, kind='high')
+
+    waves = []
+    for i in range(base_high.shape[0]):
+        highs, lows = base_high[i], base_low[i]
+        if np.isnan(highs).all():
+            waves.append((np.array([], dtype=int), np.array([])))
+            continue
+        start = int(np.nanargmax(highs))
+        starts = np.flatnonzero(swing_highs[i])
+        starts = np.concatenate(([start], starts[starts > start]))
+        troughs = np.fmin.reduceat(lows, starts)
+        depths = (1 - troughs / highs[starts]) * 100
+        keep = depths >= MIN_WAVE_DEPTH
+        waves.append((starts[keep], depths[keep]))
+    return waves
+
+
+def contraction_count(depths):
+    """Length of the run of strictly shrinking waves ending at the latest one (T1 > T2 > T3 -> 3)"""
+    if len(depths) == 0:
+        return 0
+    shrinking = depths[1:] < depths[:-1]
+    run = len(shrinking) - np.flatnonzero(~shrinking)[-1] - 1 if (~shrinking).any() else len(shrinking)
+    return int(run) + 1
+
+
+def is_timeout(error):
+    """True for deadline failures: TimeoutError, or its message once get_assets_data stringified it"""
+    if isinstance(error, TimeoutError):
+        return True
+    message = str(error).lower()
+    return 'timed out' in message or 'no candles within' in message
+
+
+def find_vcp_candidates(symbols=None, time_budget=VCP_TIME_BUDGET):
     """
     Scans list of symbols for Mark Minervini's VCP (Volatility Contraction Pattern).
     Focuses on High Value Signals:
@@ -19,169 +101,161 @@ def find_vcp_candidates(symbols):
     3. Volume Dry-Up (Supply exhaustion)
     4. Pivot Point (Buy signal)
     """
+    return scan_vcp(symbols, time_budget)['signals']
+
+
+def scan_vcp(symbols=None, time_budget=VCP_TIME_BUDGET):
+    """
+    VCP scan with run statistics.
+
+    Candles are fetched concurrently by get_assets_data; symbols whose data is
+    not in within `time_budget` seconds are reported as failures and the scan
+    continues with the rest. The universe is then scored as one aligned
+    (symbols x bars) panel, so every criterion is a few array operations.
+    Symbols with fewer than YEAR_BARS bars (recent listings) are scored on the
+    history they have, so their 52-week high/low covers less than a year; they
+    are counted in stats['partial_year'].
+    Returns: { 'signals': [candidates], 'stats': {duration, counts, errors} }
+    """
+    started = time.monotonic()
     candidates = []
-    
-    # Target Major Mid-Large Caps for reliable patterns
-    SUPPORTED_TICKERS = [
-        'BTC', 'ETH', 'XRP', 'SOL', 'BNB', 'DOGE', 'ADA', 'TRX', 'AVAX', 'LINK',
-        'TON', 'SHIB', 'DOT', 'XLM', 'BCH', 'SUI', 'HBAR', 'LTC', 'PEPE', 'UNI',
-        'NEAR', 'APT', 'ICP', 'ETC', 'MATIC', 'TAO', 'AAVE', 'FIL', 'STX', 'VET',
-        'ATOM', 'INJ', 'RNDR', 'IMX', 'ARB', 'OP', 'MKR', 'GRT', 'THETA', 'FTM',
-        'ALGO', 'SEI', 'TIA', 'SAND', 'MANA', 'XTZ', 'AXS', 'LDO', 'WOO', 'ZEC',
-        'JUP', 'BONK', 'STRK', 'PYTH', 'BLUR', 'WEMIX', 'GALA', 'YFI', 'FRAX', 'ONT',
-        'ZRX', 'RAY', 'EOS', 'MASK', 'APE', 'CRO', 'CFX', 'FLOW', 'ONE', 'AR'
-    ]
-    
-    clean_symbols = list(set(SUPPORTED_TICKERS))
-    
-    for symbol in clean_symbols:
-        try:
-            data = market_data_service.get_asset_data(symbol, prefer_krw=True)
-            df = data.get('raw_df')
-            
-            if df is None or df.empty or len(df) < 200:
-                continue
-                
-            close = df['Close']
-            current_price = data['current_price']
-            
-            # ---------------------------------------------------------
-            # 1. Trend Template (Mark Minervini's Stage 2 Criteria)
-            # ---------------------------------------------------------
-            sma50 = close.tail(50).mean()
-            sma150 = close.tail(150).mean()
-            sma200 = close.tail(200).mean()
-            
-            # Conditions
-            c1 = current_price > sma150 and current_price > sma200
-            c2 = sma150 > sma200
-            c3 = sma200 > sma200 * 1.01 # 200 SMA trending up (mock slope check needed or simple comparison)
-            # Ideally compare sma200 now vs 1 month ago
-            sma200_1m_ago = close.iloc[-30:-1].tail(200).mean() # Approx
-            c3 = sma200 > sma200_1m_ago
-            
-            c4 = sma50 > sma150 and sma50 > sma200
-            c5 = current_price > sma50
-            
-            low_52w = close.tail(365).min()
-            high_52w = close.tail(365).max()
-            
-            c6 = current_price > low_52w * 1.30 # At least 30% above 52w low
-            c7 = current_price > high_52w * 0.75 # Within 25% of 52w high (Consolidating near highs)
-            
-            # Trend Score
-            trend_passed = c1 and c2 and c4 and c5 and c6 and c7
-            if not trend_passed:
-                # Allow slight misses for crypto volatility, but score them lower
-                pass
-
-            # ---------------------------------------------------------
-            # 2. VCP Contraction Detection
-            # ---------------------------------------------------------
-            # Logic: Find recent swing highs and lows to detect waves (T1, T2, T3)
-            # A valid VCP should have diminishing depth (e.g., -20%, -10%, -5%)
-            
-            window = 60 # Look at last 60 days for the base
-            base_df = df.tail(window).copy()
-            base_high = base_df['High'].max()
-            
-            # Simple contraction metric: StdDev of price in recent chunks
-            vol_last_10 = base_df['Close'].tail(10).std()
-            vol_prev_20 = base_df['Close'].iloc[-30:-10].std()
-            
-            is_contracting = vol_last_10 < vol_prev_20 * 0.8
-            
-            # Depth Calculation (Drawdown from recent high)
-            recent_high = base_df['High'].tail(20).max()
-            depth_pct = ((recent_high - current_price) / recent_high) * 100
-            
-            # Time Consolidation
-            days_since_high = (base_df.index[-1] - base_df['High'].tail(20).idxmax()) if not isinstance(base_df.index, pd.RangeIndex) else 0 # Complicated with default integer index
-            
-            # ---------------------------------------------------------
-            # 3. Volume Dry-Up
-            # ---------------------------------------------------------
-            vol_sma_50 = df['Volume'].tail(50).mean()
-            vol_recent_avg = df['Volume'].tail(5).mean()
-            
-            # We want volume to be below average during the tightest part
-            volume_dry_up = vol_recent_avg < vol_sma_50 * 0.7
-            
-            dry_up_ratio = vol_recent_avg / vol_sma_50
-            
-            # ---------------------------------------------------------
-            # 4. Pivot Point & Signal
-            # ---------------------------------------------------------
-            # Ideally buying when it breaks above the pivot (recent minor high)
-            pivot_price = recent_high
-            dist_to_pivot = ((pivot_price - current_price) / current_price) * 100
-            
-            # ---------------------------------------------------------
-            # Scoring System (0-100)
-            # ---------------------------------------------------------
-            score = 0
-            
-            # A. Trend (40pts)
-            if c1 and c2: score += 10
-            if c4: score += 10
-            if c5: score += 10
-            if c7: score += 10 # Near 52w high is crucial for Leader stocks
-            
-            # B. Pattern Structure (30pts)
-            if is_contracting: score += 15
-            if depth_pct < 10: score += 15 # Tight close
-            elif depth_pct < 15: score += 10
-            
-            # C. Volume (20pts)
-            if volume_dry_up: score += 20
-            elif dry_up_ratio < 1.0: score += 10
-            
-            # D. Momentum (10pts)
-            rsi = 50 # Default
-            try:
-                delta = close.diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                rsi = rsi.iloc[-1]
-            except: pass
-            
-            if 50 < rsi < 70: score += 10 # Sweet spot
-            
-            # Grade Assignment
-            if score >= 85: grade = 'A'
-            elif score >= 70: grade = 'B'
-            elif score >= 50: grade = 'C'
-            else: grade = 'D'
-            
-            # Detailed Reason for UI
-            reasons = []
-            if c7: reasons.append("52주 신고가 근접")
-            if is_contracting: reasons.append("변동성 축소 확인")
-            if volume_dry_up: reasons.append(f"거래량 급감 (평소 대비 {int(dry_up_ratio*100)}%)")
-            if depth_pct < 5: reasons.append("초밀집 구간 (Pivot 임박)")
-            
-            # Construct Result
-            if score >= 50: # Only return actionable candidates
-                candidates.append({
-                    'symbol': symbol,
-                    'score': score,
-                    'grade': grade,
-                    'current_price': current_price,
-                    'pivot_price': pivot_price,
-                    'depth_pct': depth_pct,
-                    'dry_up_ratio': dry_up_ratio,
-                    'vol_contracting': is_contracting,
-                    'reasons': reasons,
-                    'currency': 'KRW' if 'KRW' in data.get('source', '') else 'USD',
-                    'timestamp': datetime.now().isoformat()
-                })
-                
-        except Exception as e:
-            continue
-            
+
+    # Default universe: top Upbit KRW markets by volume (patterns need liquid names)
+    if not symbols:
+        symbols = universe_manager.get_universe('vcp')
+    clean_symbols = list(dict.fromkeys(symbols))
+
+    # One batched round trip for the whole list
+    # (365 daily bars so the 52-week high/low checks see a full year; the
+    # candle loader paginates past Upbit's 200-candle per-call limit)
+    batch = market_data_service.get_assets_data(
+        clean_symbols, prefer_krw=True, bars=YEAR_BARS, time_budget=time_budget
+    )
+    fetch_seconds = time.monotonic() - started
+
+    results = {
+        symbol: data for symbol, data in batch['results'].items()
+        if data.get('raw_df') is not None and len(data['raw_df']) >= MIN_BARS
+    }
+    errors = batch['errors']
+    stats = {
+        'symbols': len(clean_symbols),
+        'scanned': len(results),
+        'failed': len(errors),
+        'timed_out': sum(1 for msg in errors.values() if is_timeout(msg)),
+        'short_history': len(batch['results']) - len(results),
+        # Scanned, but with less than a year of bars for the 52-week checks
+        'partial_year': sum(1 for data in results.values() if len(data['raw_df']) < YEAR_BARS),
+        'errors': {symbol: str(msg)[:200] for symbol, msg in errors.items()},
+        'time_budget_sec': time_budget,
+        'fetch_sec': round(fetch_seconds, 2),
+    }
+
+    def finish():
+        stats['duration_sec'] = round(time.monotonic() - started, 2)
+        stats['candidates'] = len(candidates)
+        if errors:
+            print(f"[VCP] {len(errors)}/{len(clean_symbols)} symbols failed ({stats['timed_out']} timed out)")
+        return {'signals': candidates, 'stats': stats}
+
+    if not results:
+        return finish()
+
+    panel = bi.panel_from_frames({symbol: data['raw_df'] for symbol, data in results.items()}, YEAR_BARS)
+    close, high, low, volume = panel['Close'], panel['High'], panel['Low'], panel['Volume']
+    price = np.array([results[symbol]['current_price'] for symbol in panel['symbols']], dtype=np.float64)
+
+    # ---------------------------------------------------------
+    # 1. Trend Template (Mark Minervini's Stage 2 Criteria)
+    # ---------------------------------------------------------
+    trend = trend_template(close, price)
+
+    # ---------------------------------------------------------
+    # 2. VCP Contraction Detection
+    # ---------------------------------------------------------
+    # Swing high -> swing low waves of the base; a valid VCP has
+    # diminishing depth (e.g., -20%, -10%, -5%)
+    waves = contraction_waves(high, low)
+
+    # Depth Calculation (Drawdown from recent high)
+    recent_high = np.nanmax(high[:, -20:], axis=1)
+    depth_pct = (recent_high - price) / recent_high * 100
+
+    # ---------------------------------------------------------
+    # 3. Volume Dry-Up
+    # ---------------------------------------------------------
+    # We want volume to be below average during the tightest part
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dry_up_ratio = bi.tail_mean(volume, 5) / bi.tail_mean(volume, 50)
+    volume_dry_up = dry_up_ratio < 0.7
+
+    # ---------------------------------------------------------
+    # 4. Momentum
+    # ---------------------------------------------------------
+    rsi = bi.rsi(close, 14)[:, -1]
+
+    # ---------------------------------------------------------
+    # Scoring System (0-100)
+    # ---------------------------------------------------------
+    # A. Trend (40pts)
+    score = (
+        10 * (trend['c1'] & trend['c2'])
+        + 10 * trend['c4']
+        + 10 * trend['c5']
+        + 10 * trend['c7']  # Near 52w high is crucial for Leader stocks
+    )
+
+    # B. Pattern Structure (30pts)
+    counts = np.array([contraction_count(depths) for _, depths in waves])
+    score = score + np.select([counts >= 3, counts == 2], [15, 10], 0)
+    score = score + np.select([depth_pct < 10, depth_pct < 15], [15, 10], 0)  # Tight close
+
+    # C. Volume (20pts)
+    score = score + np.select([volume_dry_up, dry_up_ratio < 1.0], [20, 10], 0)
+
+    # D. Momentum (10pts)
+    score = score + 10 * ((rsi > 50) & (rsi < 70))  # Sweet spot
+
+    timestamp = datetime.now().isoformat()
+    for i in np.flatnonzero(score >= 50):  # Only return actionable candidates
+        symbol = panel['symbols'][i]
+        data = results[symbol]
+        starts, depths = waves[i]
+        count = counts[i]
+        sequence = depths[len(depths) - count:]
+
+        # Pivot Point: buy when it breaks above the high that opened the last contraction
+        base_offset = close.shape[1] - min(BASE_WINDOW, close.shape[1])
+        pivot_price = high[i, base_offset + starts[-1]] if count else recent_high[i]
+
+        s = int(score[i])
+        if s >= 85: grade = 'A'
+        elif s >= 70: grade = 'B'
+        elif s >= 50: grade = 'C'
+        else: grade = 'D'
+
+        # Detailed Reason for UI
+        reasons = []
+        if trend['c7'][i]: reasons.append("52주 신고가 근접")
+        if count >= 2: reasons.append(f"{count}단계 변동성 축소 ({' → '.join(f'{d:.0f}%' for d in sequence)})")
+        if volume_dry_up[i]: reasons.append(f"거래량 급감 (평소 대비 {int(dry_up_ratio[i]*100)}%)")
+        if depth_pct[i] < 5: reasons.append("초밀집 구간 (Pivot 임박)")
+
+        candidates.append({
+            'symbol': symbol,
+            'score': s,
+            'grade': grade,
+            'current_price': data['current_price'],
+            'pivot_price': float(pivot_price),
+            'depth_pct': float(depth_pct[i]),
+            'dry_up_ratio': float(dry_up_ratio[i]),
+            'vol_contracting': bool(count >= 2),
+            'contractions': [round(float(d), 2) for d in sequence],
+            'reasons': reasons,
+            'currency': 'KRW' if 'KRW' in data.get('source', '') else 'USD',
+            'timestamp': timestamp
+        })
+
     # Sort
     candidates.sort(key=lambda x: x['score'], reverse=True)
-    return candidates
-
+    return finish()
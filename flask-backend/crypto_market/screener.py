@@ -1,23 +1,17 @@
 
-import concurrent.futures
+import os
+
 from market_provider import market_data_service
 from crypto_market.indicators import (
-    rsi, relative_volume, macd, bollinger_bands, 
     find_support_resistance, detect_rsi_divergence, 
     calculate_risk_reward, get_entry_quality
 )
-import numpy as np
-import pandas as pd
+from crypto_market.batch_indicators import panel_from_frames, compute_indicators, indicator_rows
+from crypto_market.universe import universe_manager
 from datetime import datetime
 
-SCREENER_SYMBOLS = [
-    'BTC', 'ETH', 'SOL', 'BNB', 'XRP',
-    'ADA', 'DOGE', 'AVAX', 'TRX', 'DOT',
-    'LINK', 'MATIC', 'SHIB', 'LTC', 'BCH',
-    'ATOM', 'UNI', 'ETC', 'FIL', 'NEAR',
-    'APT', 'INJ', 'RNDR', 'STX', 'IMX',
-    'ARB', 'OP', 'SUI', 'SEI', 'TIA'
-]
+# Seconds a full scan may spend fetching before it scores what it has
+SCREENER_TIME_BUDGET = float(os.getenv('SCREENER_TIME_BUDGET', '45'))
 
 
 def generate_action_guide(item):
@@ -65,178 +59,214 @@ def generate_action_guide(item):
     }
 
 
+def build_feature_table(symbols, time_budget=SCREENER_TIME_BUDGET):
+    """
+    One batch fetch + one vectorized indicator pass (crypto_market.batch_indicators)
+    for the whole universe, plus the per-symbol S/R and divergence checks.
+    Every screener tab is derived from these rows, so a full scan fetches and
+    computes everything exactly once. Symbols whose data isn't in by
+    `time_budget` seconds are left out of this scan.
+    Returns [feature dict] for symbols with candle data.
+    """
+    batch = market_data_service.get_assets_data(symbols, time_budget=time_budget)
+    if batch['errors']:
+        print(f"[Screener] {len(batch['results'])} symbols scanned, {len(batch['errors'])} skipped")
+    items = {
+        sym: item for sym, item in batch['results'].items()
+        if item and item.get('raw_df') is not None and not item['raw_df'].empty
+    }
+    if not items:
+        return []
+
+    panel = panel_from_frames({sym: item['raw_df'] for sym, item in items.items()})
+    table = compute_indicators(panel)
+
+    features = []
+    for i, (sym, ind) in enumerate(zip(panel['symbols'], indicator_rows(panel, table))):
+        try:
+            item = items[sym]
+            df = item['raw_df']
+            current_price = item['current_price']
+            sr_data = find_support_resistance(df)
+            features.append({
+                'symbol': item['symbol'],
+                'price': current_price,
+                'change_24h': item['change_24h'],
+                'change_1h': item.get('change_1h', 0),
+                'volume': df['Volume'].iloc[-1],
+                'rsi': float(ind['rsi']),
+                'rvol': float(ind['rvol']),
+                'macd_crossover': ind['macd_crossover'],
+                'bb_position': float(ind['bb_position']),
+                'sma200': float(ind['sma200']),
+                'ath': float(ind['ath']),
+                'atl': float(ind['atl']),
+                'volatility': float(ind['volatility']),
+                'support': sr_data['support'],
+                'resistance': sr_data['resistance'],
+                'rr_ratio': calculate_risk_reward(current_price, sr_data['support'], sr_data['resistance']),
+                'divergence': detect_rsi_divergence(df['Close'], table['rsi_series'][i]),
+            })
+        except Exception as e:
+            print(f"[Screener] Feature error for {sym}: {e}")
+            continue
+    return features
+
+
+def breakout_rows(features):
+    """Tab 1: Breakout Scanner - Enhanced with Actionable Guides"""
+    results = []
+    for f in features:
+        try:
+            current_price = f['price']
+            sma200 = f['sma200']
+            rsi_val = f['rsi']
+            
+            # 진입 적합도 평가
+            grade_data = get_entry_quality(f['rr_ratio'], rsi_val, f['macd_crossover'], f['divergence'])
+            
+            data_item = {
+                'symbol': f['symbol'],
+                'price': current_price,
+                'change_24h': f['change_24h'],
+                'change_1h': f['change_1h'],
+                'volume': f['volume'],
+                'sma200': sma200,
+                'rsi': round(rsi_val, 1),
+                'rvol': round(f['rvol'], 2),
+                'macd_signal': f['macd_crossover'],
+                'bb_position': round(f['bb_position'], 2),
+                'support': f['support'],
+                'resistance': f['resistance'],
+                'rr_ratio': f['rr_ratio'],
+                'divergence': f['divergence'],
+                'grade_data': grade_data, # score, grade, label, reasons
+                'pct_from_sma200': round(((current_price - sma200) / sma200) * 100 if sma200 else 0, 1)
+            }
+            
+            # 투자 가이드 생성
+            data_item['action_guide'] = generate_action_guide(data_item)
+            
+            # 기존 프론트엔드 호환성 유지 래퍼 (signal_type, strength 등)
+            data_item['signal_type'] = "BUY" if grade_data['grade'] in ['A', 'B'] else ("SELL" if grade_data['grade'] == 'D' and rsi_val > 70 else "WATCH")
+            data_item['signal_strength'] = grade_data['score']
+            data_item['signal_reason'] = data_item['action_guide']['guide']
+
+            results.append(data_item)
+        except Exception:
+            continue
+
+    # 정렬: 등급(A->D) 순, 그 다음 점수 순
+    results.sort(key=lambda x: x['grade_data']['score'], reverse=True)
+    return results
+
+
+def value_rows(features):
+    """Tab 2: Value & Price Performance"""
+    results = []
+    for f in features:
+        try:
+            current_price = f['price']
+            ath, atl = f['ath'], f['atl']
+            
+            drawdown = ((current_price - ath) / ath) * 100 if ath > 0 else 0
+            from_atl = ((current_price - atl) / atl) * 100 if atl > 0 else 0
+            rsi_val = f['rsi']
+            rr_ratio = f['rr_ratio']
+            
+            # 저평가 점수
+            score = 0
+            if drawdown < -70: score += 2
+            if rsi_val < 30: score += 2
+            if rr_ratio > 3: score += 2
+            
+            # 간단 가이드
+            guide = "관망"
+            if score >= 4: guide = "강력 매수 기회 (저평가)"
+            elif score >= 2: guide = "분할 매수 고려"
+            
+            results.append({
+                'symbol': f['symbol'],
+                'price': current_price,
+                'change_24h': f['change_24h'],
+                'ath': ath,
+                'drawdown': round(drawdown, 1),
+                'from_atl': round(from_atl, 1),
+                'rsi': round(rsi_val, 1),
+                'rr_ratio': rr_ratio,
+                'value_score': score,
+                'action_guide': guide,
+                'support': f['support']
+            })
+        except:
+            continue
+
+    # 저평가 순 (Drawdown 큰 순서)
+    results.sort(key=lambda x: x['drawdown'])
+    return results
+
+
+def risk_rows(features):
+    """Tab 3: Risk & Volatility Analysis"""
+    results = []
+    for f in features:
+        try:
+            volatility = f['volatility']
+            rsi_val = f['rsi']
+            bb_position = f['bb_position']
+            
+            # 리스크 점수 (높을수록 위험)
+            risk_score = volatility / 20.0 # 기본 변동성 점수
+            
+            if rsi_val > 70 or rsi_val < 30: risk_score += 1.5
+            if bb_position > 0.95 or bb_position < 0.05: risk_score += 1.0
+            
+            rating = 'Low'
+            if risk_score > 5: rating = 'Extreme'
+            elif risk_score > 3: rating = 'High'
+            elif risk_score > 1.5: rating = 'Medium'
+            
+            results.append({
+                'symbol': f['symbol'],
+                'price': f['price'],
+                'change_24h': f['change_24h'],
+                'volatility': round(volatility, 1),
+                'risk_score': round(risk_score, 1),
+                'rating': rating,
+                'rsi': round(rsi_val, 1),
+                'bb_position': round(bb_position, 2)
+            })
+        except:
+            continue
+
+    results.sort(key=lambda x: x['risk_score'])
+    return results
+
+
 class ScreenerService:
+    def run_all_scans(self, symbols=None):
+        """
+        All three tabs from a single fetch and feature table.
+        Returns {'breakout': [...], 'performance': [...], 'risk': [...]}
+        """
+        features = build_feature_table(symbols or universe_manager.get_universe('screener'))
+        return {
+            'breakout': breakout_rows(features),
+            'performance': value_rows(features),
+            'risk': risk_rows(features),
+        }
+
     def run_breakout_scan(self):
         """Tab 1: Breakout Scanner - Enhanced with Actionable Guides"""
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(market_data_service.get_asset_data, sym): sym for sym in SCREENER_SYMBOLS}
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    item = future.result()
-                    if not item: continue
-                    
-                    df = item['raw_df']
-                    current_price = item['current_price']
-                    if df is None or df.empty: continue
-                    
-                    # 1. 기술적 지표 계산
-                    sma20 = item['ma_20'] if item.get('ma_20') else df['Close'].tail(20).mean()
-                    sma200 = df['Close'].tail(200).mean()
-                    
-                    rsi_val = float(rsi(df['Close'], 14).iloc[-1])
-                    rvol = float(relative_volume(df['Volume'], 20))
-                    macd_data = macd(df['Close'])
-                    bb_data = bollinger_bands(df['Close'])
-                    sr_data = find_support_resistance(df)
-                    
-                    # 다이버전스 감지 (신규)
-                    divergence = detect_rsi_divergence(df['Close'], rsi(df['Close'], 14))
-                    
-                    # 2. 위험보상비율 계산 (신규)
-                    rr_ratio = calculate_risk_reward(current_price, sr_data['support'], sr_data['resistance'])
-                    
-                    # 3. 진입 적합도 평가 (신규)
-                    grade_data = get_entry_quality(rr_ratio, rsi_val, macd_data['crossover'], divergence)
-                    
-                    # 4. 데이터셋 구성
-                    data_item = {
-                        'symbol': item['symbol'],
-                        'price': current_price,
-                        'change_24h': item['change_24h'],
-                        'change_1h': item.get('change_1h', 0),
-                        'volume': df['Volume'].iloc[-1],
-                        'sma200': sma200,
-                        'rsi': round(rsi_val, 1),
-                        'rvol': round(rvol, 2),
-                        'macd_signal': macd_data['crossover'],
-                        'bb_position': round(bb_data['position'], 2),
-                        'support': sr_data['support'],
-                        'resistance': sr_data['resistance'],
-                        'rr_ratio': rr_ratio,
-                        'divergence': divergence,
-                        'grade_data': grade_data, # score, grade, label, reasons
-                        'pct_from_sma200': round(((current_price - sma200) / sma200) * 100 if sma200 else 0, 1)
-                    }
-                    
-                    # 5. 투자 가이드 생성 (신규)
-                    data_item['action_guide'] = generate_action_guide(data_item)
-                    
-                    # 기존 프론트엔드 호환성 유지 래퍼 (signal_type, strength 등)
-                    data_item['signal_type'] = "BUY" if grade_data['grade'] in ['A', 'B'] else ("SELL" if grade_data['grade'] == 'D' and rsi_val > 70 else "WATCH")
-                    data_item['signal_strength'] = grade_data['score']
-                    data_item['signal_reason'] = data_item['action_guide']['guide']
-
-                    results.append(data_item)
-                except Exception as e:
-                    # print(f"Scan Error {future}: {e}")
-                    continue
-
-        # 정렬: 등급(A->D) 순, 그 다음 점수 순
-        results.sort(key=lambda x: x['grade_data']['score'], reverse=True)
-        return results
+        return breakout_rows(build_feature_table(universe_manager.get_universe('screener')))
 
     def run_price_performance_scan(self):
         """Tab 2: Value & Price Performance"""
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(market_data_service.get_asset_data, sym): sym for sym in SCREENER_SYMBOLS}
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    item = future.result()
-                    if not item: continue
-                    
-                    df = item['raw_df']
-                    current_price = item['current_price']
-                    if df is None or df.empty: continue
-                    
-                    ath = df['High'].max()
-                    atl = df['Low'].min()
-                    
-                    drawdown = ((current_price - ath) / ath) * 100 if ath > 0 else 0
-                    from_atl = ((current_price - atl) / atl) * 100 if atl > 0 else 0
-                    rsi_val = float(rsi(df['Close'], 14).iloc[-1])
-                    
-                    sr_data = find_support_resistance(df)
-                    rr_ratio = calculate_risk_reward(current_price, sr_data['support'], sr_data['resistance'])
-                    
-                    # 저평가 점수
-                    score = 0
-                    if drawdown < -70: score += 2
-                    if rsi_val < 30: score += 2
-                    if rr_ratio > 3: score += 2
-                    
-                    # 간단 가이드
-                    guide = "관망"
-                    if score >= 4: guide = "강력 매수 기회 (저평가)"
-                    elif score >= 2: guide = "분할 매수 고려"
-                    
-                    results.append({
-                        'symbol': item['symbol'],
-                        'price': current_price,
-                        'change_24h': item['change_24h'],
-                        'ath': ath,
-                        'drawdown': round(drawdown, 1),
-                        'from_atl': round(from_atl, 1),
-                        'rsi': round(rsi_val, 1),
-                        'rr_ratio': rr_ratio,
-                        'value_score': score,
-                        'action_guide': guide,
-                        'support': sr_data['support']
-                    })
-                except:
-                    continue
-        
-        # 저평가 순 (Drawdown 큰 순서)
-        results.sort(key=lambda x: x['drawdown'])
-        return results
+        return value_rows(build_feature_table(universe_manager.get_universe('screener')))
 
     def run_risk_scan(self):
         """Tab 3: Risk & Volatility Analysis"""
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(market_data_service.get_asset_data, sym): sym for sym in SCREENER_SYMBOLS}
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    item = future.result()
-                    if not item: continue
-                    
-                    df = item['raw_df']
-                    current_price = item['current_price']
-                    if df is None or df.empty: continue
-                    
-                    returns = df['Close'].pct_change().dropna()
-                    volatility = float(returns.std() * np.sqrt(365) * 100) if len(returns) > 1 else 0
-                    
-                    rsi_val = float(rsi(df['Close'], 14).iloc[-1])
-                    bb_data = bollinger_bands(df['Close'])
-                    
-                    # 리스크 점수 (높을수록 위험)
-                    risk_score = volatility / 20.0 # 기본 변동성 점수
-                    
-                    if rsi_val > 70 or rsi_val < 30: risk_score += 1.5
-                    if bb_data['position'] > 0.95 or bb_data['position'] < 0.05: risk_score += 1.0
-                    
-                    rating = 'Low'
-                    if risk_score > 5: rating = 'Extreme'
-                    elif risk_score > 3: rating = 'High'
-                    elif risk_score > 1.5: rating = 'Medium'
-                    
-                    results.append({
-                        'symbol': item['symbol'],
-                        'price': current_price,
-                        'change_24h': item['change_24h'],
-                        'volatility': round(volatility, 1),
-                        'risk_score': round(risk_score, 1),
-                        'rating': rating,
-                        'rsi': round(rsi_val, 1),
-                        'bb_position': round(bb_data['position'], 2)
-                    })
-                except:
-                    continue
-        
-        results.sort(key=lambda x: x['risk_score'])
-        return results
+        return risk_rows(build_feature_table(universe_manager.get_universe('screener')))
 
 
 screener_service = ScreenerService()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Scan universes built from exchange listings.
+
+Each named universe is the top N spot markets of one exchange/quote by 24h
+quote volume (one fetch_tickers call), refreshed at most once per TTL and
+shared by the screener, the VCP scan and the market gate breadth. If the
+exchange can't be reached the last good universe is kept, and before the
+first successful build a static list of large caps is used.
+"""
+import os
+import threading
+import time
+from typing import Dict, List
+
+# Static fallback: major large caps on both Binance (USDT) and Upbit (KRW)
+CORE_SYMBOLS = [
+    'BTC', 'ETH', 'SOL', 'BNB', 'XRP',
+    'ADA', 'DOGE', 'AVAX', 'TRX', 'DOT',
+    'LINK', 'MATIC', 'SHIB', 'LTC', 'BCH',
+    'ATOM', 'UNI', 'ETC', 'FIL', 'NEAR',
+    'APT', 'INJ', 'RNDR', 'STX', 'IMX',
+    'ARB', 'OP', 'SUI', 'SEI', 'TIA'
+]
+
+# Stablecoins and fiat proxies never make sense as scan targets
+EXCLUDED_BASES = {
+    'USDT', 'USDC', 'BUSD', 'DAI', 'TUSD', 'FDUSD', 'USDP', 'USDD', 'PYUSD',
+    'USDE', 'USD1', 'EUR', 'EURI', 'AEUR', 'GBP', 'TRY', 'BRL', 'PAXG', 'WBTC', 'WBETH',
+}
+
+# name -> (exchange_id, quote, size)
+UNIVERSES = {
+    'screener': ('binance', 'USDT', int(os.getenv('SCREENER_UNIVERSE_SIZE', '100'))),
+    'vcp': ('upbit', 'KRW', int(os.getenv('VCP_UNIVERSE_SIZE', '70'))),
+    'breadth': ('binance', 'USDT', int(os.getenv('BREADTH_UNIVERSE_SIZE', '80'))),
+}
+DEFAULT_TTL = 3600
+RETRY_AFTER = 60  # seconds before retrying a failed ranking
+
+
+def is_scannable(base: str) -> bool:
+    return base not in EXCLUDED_BASES
+
+
+class UniverseManager:
+    def __init__(self, ttl: int = DEFAULT_TTL):
+        self.ttl = ttl
+        self._cache: Dict[tuple, tuple] = {}  # (exchange, quote) -> (ranked symbols, built_at)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def _ranked(self, exchange_id: str, quote: str) -> List[str]:
+        key = (exchange_id, quote)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.time() - cached[1] < self.ttl:
+            return cached[0]
+
+        with self._build_lock:
+            # Another caller may have rebuilt it while we waited
+            with self._lock:
+                cached = self._cache.get(key)
+            if cached and time.time() - cached[1] < self.ttl:
+                return cached[0]
+            try:
+                from market_provider import market_data_service
+                ranking = market_data_service.get_quote_volume_ranking(exchange_id, quote)
+                symbols = [base for base, _ in ranking if is_scannable(base)]
+                if not symbols:
+                    raise ValueError("empty ranking")
+            except Exception as e:
+                print(f"[Universe] Could not rank {exchange_id} {quote} markets: {e}")
+                symbols = cached[0] if cached else list(CORE_SYMBOLS)
+                with self._lock:
+                    self._cache[key] = (symbols, time.time() - self.ttl + RETRY_AFTER)
+                return symbols
+            with self._lock:
+                self._cache[key] = (symbols, time.time())
+            print(f"[Universe] {exchange_id} {quote}: {len(symbols)} markets ranked by volume")
+            return symbols
+
+    def get_universe(self, name: str = 'screener', size: int = None) -> List[str]:
+        """Top `size` symbols (default from UNIVERSES) of a named universe, by quote volume"""
+        exchange_id, quote, default_size = UNIVERSES[name]
+        return self._ranked(exchange_id, quote)[:size or default_size]
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+
+universe_manager = UniverseManager()
@@ -0,0 +1,158 @@
+"""
+Shared pooled HTTP client for the backend's plain REST calls
+(CoinMarketCap, Binance futures, Upbit, alternative.me, exchange rates).
+
+A single requests.Session keeps a bounded keep-alive pool per host, every
+call gets a default timeout, idempotent requests are retried with jittered
+exponential backoff, and a per-host circuit breaker fails fast while an
+upstream keeps erroring instead of making every caller wait out its timeout.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+    After `reset_timeout` seconds one trial call is let through (half-open);
+    its outcome closes the breaker again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    def __init__(self, pool_maxsize=10, timeout=(3.05, 10), retries=2, backoff=0.3,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'TokenPost-PRO/1.0'})
+        # pool_block caps concurrent connections per host at pool_maxsize
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=pool_maxsize, pool_block=True, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._breakers_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def _sleep_before_retry(self, attempt, response=None):
+        delay = self.backoff * (2 ** attempt)
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, min(float(retry_after), 10.0))
+        time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        method = method.upper()
+        host = urlparse(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        timeout = timeout or self.timeout
+
+        last_error = None
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = e
+                if attempt < retries:
+                    self._sleep_before_retry(attempt)
+                continue
+            except Exception:
+                breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUS and attempt < retries:
+                self._sleep_before_retry(attempt, response)
+                continue
+
+            if response.status_code in RETRY_STATUS:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return response
+
+        breaker.record_failure()
+        raise last_error
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._breakers_lock:
+            return {host: {'state': b.state, 'failures': b.failures} for host, b in self._breakers.items()}
+
+
+http_client = HttpClient()
@@ -1,188 +1,540 @@
 import ccxt
 import os
-import requests
 import pandas as pd
 import concurrent.futures
+import contextvars
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+from candle_cache import candle_cache, OhlcvPager, TIMEFRAME_MS
+from rate_limiter import get_rate_limiter, attach_rate_limiter
+from async_market_engine import async_market_engine
+from http_client import http_client
+from source_health import get_source_health, is_source_failure, source_health_stats
+from crypto_market.indicators import IndicatorSet
+from crypto_market.models import CandleArray, OHLCV_COLUMNS
+
 print("DEBUG: Loaded MarketDataService Module")
 
+def ohlcv_to_df(ohlcv):
+    """Cached (n, 6) candle array -> DataFrame view (no copy of the candle data)"""
+    return CandleArray(ohlcv).to_df(OHLCV_COLUMNS)
+
 class MarketDataService:
     def __init__(self):
+        # ccxt throttling goes through the shared per-exchange buckets (rate_limiter),
+        # which prioritise API requests over scheduler scans across all clients.
+
         # 1. Binance (CCXT) - Public/Free/Fast
-        self.binance = ccxt.binance({
-            'enableRateLimit': True,
+        self.binance = attach_rate_limiter(ccxt.binance({
             'options': {'defaultType': 'spot'},
             'timeout': 3000  # 3s timeout
-        })
+        }))
         
         # 2. Upbit (CCXT) - For KRW Pairs (Critical for Korean Context)
-        self.upbit = ccxt.upbit({
-            'enableRateLimit': True,
+        self.upbit = attach_rate_limiter(ccxt.upbit({
             'timeout': 3000  # 3s timeout
-        })
+        }))
         
         # 3. CoinMarketCap (Requires Key)
         self.cmc_api_key = os.getenv('COINMARKETCAP_API_KEY')
         self.cmc_base_url = "https://pro-api.coinmarketcap.com"
 
         # 4. Bithumb (CCXT)
-        self.bithumb = ccxt.bithumb({
-            'enableRateLimit': True,
+        self.bithumb = attach_rate_limiter(ccxt.bithumb({
             'timeout': 3000
-        })
+        }))
+
+        # Shared candle cache (TTL + LRU + single-flight)
+        self.candle_cache = candle_cache
+        self._cmc_names = {}
+
+        # Optional get_asset_data hedging: start an equivalent source after this many
+        # seconds without an answer (unset/0 = sources are tried one after another)
+        self.hedge_after = float(os.getenv('ASSET_HEDGE_AFTER_MS', '0')) / 1000
 
-    def get_asset_data(self, symbol, prefer_krw=False):
+        # Streaming EMA/RSI/MACD/ATR state per candle series, advanced one closed bar at a time
+        # keyed by (exchange, pair, timeframe, window depth), least recently used evicted first
+        self._indicator_states = OrderedDict()
+        self._indicator_lock = threading.Lock()
+        self.max_indicator_states = int(os.getenv('INDICATOR_STATE_MAX', '2000'))
+        self._hedge_pool = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix='asset-source')
+
+    def _fetch_ohlcv_cached(self, exchange, pair, timeframe='1d', limit=200):
+        """
+        fetch_ohlcv through the process-wide candle cache.
+        Warm refreshes only request bars since the last cached (open) bar.
+        """
+        key = (exchange.id, pair, timeframe)
+        return self.candle_cache.get_or_load(key, self._ohlcv_loader(exchange, pair, timeframe), limit)
+
+    @staticmethod
+    def _ohlcv_loader(exchange, pair, timeframe):
+        """fetch_ohlcv(since, count) loader for the candle cache (throttled by the client, paginated)"""
+        def load(since, count):
+            pager = OhlcvPager(exchange.id, timeframe, since, count)
+            while pager.pending():
+                pager.add(exchange.fetch_ohlcv(pair, timeframe=timeframe, since=pager.since, limit=pager.limit))
+            return pager.rows
+
+        return load
+
+    def get_candles(self, symbol, timeframe='1d', bars=200, prefer_krw=False, closed_only=False):
+        """
+        Candle series (Binance USDT, or Upbit KRW if prefer_krw) as a CandleArray
+        through the candle cache, so repeated calls only fetch the bars that
+        opened since the last one. With closed_only the still-forming bar is dropped.
+        """
+        exchange, quote = (self.upbit, 'KRW') if prefer_krw else (self.binance, 'USDT')
+        ohlcv = self._fetch_ohlcv_cached(exchange, f"{self._clean_symbol(symbol)}/{quote}", timeframe, bars)
+        candles = CandleArray(ohlcv)
+        if closed_only and len(candles):
+            tf_ms = TIMEFRAME_MS[timeframe]
+            current_open = int(time.time() * 1000) // tf_ms * tf_ms
+            candles = CandleArray(candles.data[candles.ts < current_open])
+        return candles
+
+    def get_cache_stats(self):
+        return self.candle_cache.stats()
+
+    def get_source_stats(self):
+        return source_health_stats()
+
+    def get_asset_data(self, symbol, prefer_krw=False, bars=200):
         """
         Orchestrator: Uses Binance (USDT) as primary source for consistency.
+        `bars` is the number of daily candles wanted in raw_df (downloads beyond the
+        exchange's per-call limit are paginated by the candle loader).
         Returns: { 'df': DataFrame, 'source':Str, 'current_price':Float, 'currency': 'USD', ... }
         """
         symbol = symbol.upper()
         
         # 0. Clean Symbol
-        base_symbol = symbol.replace('-USD', '').replace('/USD', '').replace('KRW-', '').replace('USDT-', '')
+        base_symbol = self._clean_symbol(symbol)
 
-        result = None
-        
-        # A. If KRW preferred (e.g., for Market Pulse/Gate), try Upbit FIRST
+        # A. If KRW preferred (e.g., for Market Pulse/Gate), try Upbit FIRST (kept as KRW)
+        # 1. Binance (USDT) - Primary source for USD consistency
+        # 2. CoinMarketCap as fallback
+        # 3. Upbit as last resort (converted to USD for display consistency)
+        # (name, fetch, hedge group): only sources of the same group (same currency,
+        # candle capable) may race each other; None = fallback after a failure only
+        sources = []
         if prefer_krw:
+            sources.append(('upbit', lambda: self._fetch_upbit(base_symbol, bars), 'KRW'))
+        sources.append(('binance', lambda: self._fetch_binance(base_symbol, bars), None if prefer_krw else 'USD'))
+        if self.cmc_api_key:
+            sources.append(('cmc', lambda: self._fetch_cmc(base_symbol, bars), None if prefer_krw else 'USD'))
+        if not prefer_krw:
+            sources.append(('upbit', lambda: self._fetch_upbit_usd(base_symbol, bars), None))
+
+        result = self._route_sources(symbol, sources)
+        if result:
+            return result
+            
+        raise ValueError(f"Failed to fetch data from Binance, CMC, or Upbit for {symbol}")
+
+    def _route_sources(self, symbol, sources, hedge_after=None):
+        """
+        Try `sources` [(name, fetch, hedge_group)] in priority order and return the
+        first result. Sources whose circuit breaker is open are skipped and degraded
+        ones are tried last. With hedging enabled (`hedge_after` seconds, opt-in via
+        ASSET_HEDGE_AFTER_MS) a running attempt that takes longer than that is raced
+        by the next source if both are in the same hedge group; other sources are
+        only tried after a failure. A result without candles (quote only) is held
+        back while another attempt is still running.
+        """
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+        healths = {name: get_source_health(name) for name, _, _ in sources}
+        # Stable sort: healthy sources first, priority order within each group
+        queue = sorted(sources, key=lambda source: healths[source[0]].degraded)
+
+        def attempt(name, fetch):
+            started = time.monotonic()
             try:
-                result = self._fetch_upbit(base_symbol)
-                # Return immediately if found (keep as KRW)
-                if result:
-                    return result
+                result = fetch()
             except Exception as e:
-                print(f"[Market] Upbit preferred failed for {symbol}: {e}")
-                pass
+                healths[name].record(time.monotonic() - started, is_source_failure(e))
+                raise
+            healths[name].record(time.monotonic() - started, False)
+            return result
+
+        def can_hedge():
+            group = queue[0][2] if queue else None
+            return group is not None and group in running.values()
+
+        def launch_next():
+            while queue:
+                name, fetch, group = queue.pop(0)
+                # allow() also claims the half-open trial, so only ask right before calling
+                if healths[name].allow():
+                    future = self._hedge_pool.submit(contextvars.copy_context().run, attempt, name, fetch)
+                    names[future] = name
+                    running[future] = group
+                    return True
+                print(f"[Market] Skipping {name} for {symbol}: circuit open")
+            return False
+
+        running, names, held = {}, {}, None
+        launch_next()
+        while running:
+            timeout = hedge_after if hedge_after and can_hedge() else None
+            done, _ = concurrent.futures.wait(running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                # Latency budget spent: hedge with the next equivalent source
+                launch_next()
+                continue
+            for future in done:
+                running.pop(future)
+                name = names.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[Market] {name} failed for {symbol}: {e}")
+                    result = None
+                if result and (result.get('raw_df') is not None or not running):
+                    # Any other attempt still running finishes in the background
+                    return result
+                if result:
+                    held = held or result
+            if not running:
+                if held:
+                    return held
+                launch_next()
+            elif hedge_after and can_hedge():
+                launch_next()
+        return held
 
-        # 1. Try Binance (USDT) - Primary source for USD consistency
+    def _fetch_cmc(self, symbol, bars=200):
+        """CMC daily candles, or just the latest quote if historical data is unavailable"""
         try:
-            result = self._fetch_binance(base_symbol)
-        except Exception as e:
-            # print(f"[Market] Binance failed for {symbol}: {e}")
-            pass # Fall through to CMC
+            return self._fetch_cmc_ohlcv(symbol, bars)
+        except Exception:
+            return self._fetch_cmc_quote(symbol)
+
+    def _fetch_upbit_usd(self, symbol, bars=200):
+        """Upbit KRW data with the price converted to USD at the USDT/KRW rate"""
+        data = self._fetch_upbit(symbol, bars)
+        usd_krw_rate = 1450.0
+        try:
+            ticker = self.upbit.fetch_ticker('USDT/KRW')
+            usd_krw_rate = ticker['last']
+        except Exception:
+            pass
+        data['current_price'] = data['current_price'] / usd_krw_rate
+        data['currency'] = "USD"
+        data['source'] = "Upbit (converted)"
+        return data
+
+    @staticmethod
+    def _clean_symbol(symbol):
+        return symbol.upper().replace('-USD', '').replace('/USD', '').replace('KRW-', '').replace('USDT-', '')
+
+    def get_assets_data(self, symbols, timeframe='1d', prefer_krw=False, bars=200, max_workers=8, time_budget=None):
+        """
+        Batch version of get_asset_data for a whole symbol universe.
+        One fetch_tickers call prices every symbol on the primary exchange
+        (Upbit KRW if prefer_krw, else Binance USDT); every candle series the
+        batch needs goes through the candle cache in one bulk request that runs
+        concurrently on the async engine under the per-exchange rate limiter.
+        Symbols the primary exchange can't serve fall back to get_asset_data.
+        With a `time_budget` (seconds) whatever is not ready by then is reported
+        in errors and the rest is returned (partial results).
+        Returns: { 'results': {symbol: data}, 'errors': {symbol: message} }
+        """
+        deadline = time.monotonic() + time_budget if time_budget else None
+
+        def remaining(default):
+            return max(0.5, deadline - time.monotonic()) if deadline else default
+
+        clean_symbols = []
+        for sym in symbols:
+            base_symbol = self._clean_symbol(sym)
+            if base_symbol and base_symbol not in clean_symbols:
+                clean_symbols.append(base_symbol)
+
+        results, errors = {}, {}
+        if not clean_symbols:
+            return {'results': results, 'errors': errors}
 
-        # 2. Try CoinMarketCap as fallback
-        if not result and self.cmc_api_key:
+        if prefer_krw:
+            exchange, quote, source, currency = self.upbit, 'KRW', "Upbit (KRW)", "KRW"
+        else:
+            exchange, quote, source, currency = self.binance, 'USDT', "Binance", "USD"
+
+        tickers = self._fetch_tickers_bulk(exchange, [f"{s}/{quote}" for s in clean_symbols])
+        listed = [s for s in clean_symbols if not exchange.markets or f"{s}/{quote}" in exchange.markets]
+
+        # Candles plus the hourly reference bar behind change_1h, fetched in one go.
+        # The hourly series is only read for its last closed bar, so it stays cached
+        # until the next hour opens and costs nothing on most scans.
+        requests, hourly_keys = {}, set()
+        for sym in listed:
+            pair = f"{sym}/{quote}"
+            hourly_keys.add((exchange.id, pair, '1h'))
+            for key, limit in (((exchange.id, pair, timeframe), bars), ((exchange.id, pair, '1h'), 2)):
+                requests[key] = max(requests.get(key, 0), limit)
+        if timeframe == '1h':
+            hourly_keys.clear()
+        candles = self._fetch_ohlcv_many(exchange, requests, timeout=remaining(30), closed_only=hourly_keys)
+
+        fallback = []
+        for sym in clean_symbols:
+            pair = f"{sym}/{quote}"
+            rows = candles.get((exchange.id, pair, timeframe))
+            if rows is None or isinstance(rows, Exception) or len(rows) < 2:
+                if timeframe == '1d':
+                    fallback.append(sym)
+                else:
+                    errors[sym] = str(rows) if isinstance(rows, Exception) else f"No {timeframe} candles for {pair}"
+                continue
             try:
-                result = self._fetch_cmc_ohlcv(base_symbol)
+                results[sym] = self._summarize_candles(
+                    sym, rows,
+                    name=sym,
+                    source=source,
+                    currency=currency,
+                    prev_hour_close=self._last_closed_close(candles.get((exchange.id, pair, '1h')), '1h'),
+                    ticker=tickers.get(pair),
+                    state_key=(exchange.id, pair, timeframe)
+                )
             except Exception as e:
+                errors[sym] = str(e)
+
+        # Daily candles have the full Binance -> CMC -> Upbit fallback chain
+        if fallback:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(fallback)))
+            futures = {
+                # copy_context keeps the caller's rate-limit lane in the worker threads
+                executor.submit(contextvars.copy_context().run, self.get_asset_data, sym, prefer_krw, bars): sym
+                for sym in fallback
+            }
+            done, pending = concurrent.futures.wait(futures, timeout=remaining(None))
+            for future in done:
+                sym = futures[future]
                 try:
-                    result = self._fetch_cmc_quote(base_symbol)
-                except Exception as e2:
-                    pass
-        
-        # 3. Try Upbit as last resort (convert to USD for display consistency)
-        if not result:
-            try:
-                data = self._fetch_upbit(base_symbol)
-                
-                # If we explicitly wanted KRW but failed earlier, we should return this as KRW? 
-                # No, if prefer_krw was True, we tried A and failed. 
-                # If we are here, it matches logic 3 (fallback), so convert to USD for consistency
-                # UNLESS prefer_krw is set? Let's check.
-                # If prefer_krw is True, we probably want KRW even if we fell back here?
-                # But _fetch_upbit returns KRW by default. 
-                # So we only convert if NOT prefer_krw.
-                
-                if not prefer_krw:
-                    # Convert KRW to USD for consistency
-                    usd_krw_rate = 1450.0
+                    results[sym] = future.result()
+                except Exception as e:
+                    errors[sym] = str(e)
+            for future in pending:
+                errors[futures[future]] = "Timed out"
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {'results': results, 'errors': errors}
+
+    def _fetch_ohlcv_many(self, exchange, requests, timeout=30, closed_only=()):
+        """
+        Bulk candle fetch through the cache: requests={(exchange_id, pair, timeframe): limit}.
+        Misses run concurrently on the async engine (thread pool if ccxt async is unavailable).
+        Returns {key: array | Exception}.
+        """
+        if async_market_engine.available:
+            def bulk_loader(plan):
+                return async_market_engine.fetch_ohlcv_many(
+                    exchange.id,
+                    {key: (key[1], key[2], since, count) for key, (since, count) in plan.items()},
+                    timeout=timeout
+                )
+        else:
+            def load(key, since, count):
+                return self._ohlcv_loader(exchange, key[1], key[2])(since, count)
+
+            def bulk_loader(plan):
+                loaded = {}
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+                futures = {
+                    executor.submit(contextvars.copy_context().run, load, key, *args): key
+                    for key, args in plan.items()
+                }
+                done, pending = concurrent.futures.wait(futures, timeout=timeout)
+                for future in done:
                     try:
-                        ticker = self.upbit.fetch_ticker('USDT/KRW')
-                        usd_krw_rate = ticker['last']
-                    except Exception:
-                        pass
-                    data['current_price'] = data['current_price'] / usd_krw_rate
-                    data['currency'] = "USD"
-                    data['source'] = "Upbit (converted)"
-                
-                result = data
-            except Exception as e:
-                pass
-        
-        if result:
-            return result
-            
-        raise ValueError(f"Failed to fetch data from Binance, CMC, or Upbit for {symbol}")
+                        loaded[futures[future]] = future.result()
+                    except Exception as e:
+                        loaded[futures[future]] = e
+                for future in pending:
+                    loaded[futures[future]] = TimeoutError(f"No candles within {timeout}s")
+                executor.shutdown(wait=False, cancel_futures=True)
+                return loaded
+
+        return self.candle_cache.get_many(requests, bulk_loader, closed_only=closed_only)
+
+    def get_quote_volume_ranking(self, exchange_id='binance', quote='USDT'):
+        """
+        Active spot markets quoted in `quote`, ranked by 24h quote volume.
+        One fetch_tickers call for the whole exchange.
+        Returns [(base_symbol, quote_volume)] sorted descending.
+        """
+        exchange = {'binance': self.binance, 'upbit': self.upbit, 'bithumb': self.bithumb}[exchange_id]
+        exchange.load_markets()
+        pairs = {
+            symbol for symbol, market in exchange.markets.items()
+            if market.get('spot') and market.get('quote') == quote and market.get('active') is not False
+        }
+        # All tickers in one call (cheaper than listing hundreds of symbols)
+        if async_market_engine.available:
+            tickers = async_market_engine.fetch_tickers_sync(exchange.id, None, timeout=20)
+        else:
+            tickers = exchange.fetch_tickers()
+
+        ranking = []
+        for pair, ticker in tickers.items():
+            if pair not in pairs:
+                continue
+            market = exchange.markets[pair]
+            quote_volume = ticker.get('quoteVolume')
+            if quote_volume is None and ticker.get('baseVolume') and ticker.get('last'):
+                quote_volume = ticker['baseVolume'] * ticker['last']
+            if quote_volume:
+                ranking.append((market['base'], float(quote_volume)))
+        ranking.sort(key=lambda item: item[1], reverse=True)
+        return ranking
 
-    def _fetch_upbit(self, symbol):
+    def _fetch_tickers_bulk(self, exchange, pairs):
+        """Single fetch_tickers round trip for every listed pair (empty dict on failure)"""
+        try:
+            exchange.load_markets()
+            listed = [p for p in pairs if p in exchange.markets]
+            if not listed:
+                return {}
+            if async_market_engine.available:
+                return async_market_engine.fetch_tickers_sync(exchange.id, listed, timeout=10)
+            return exchange.fetch_tickers(listed)
+        except Exception as e:
+            print(f"[Market] fetch_tickers failed on {exchange.id}: {e}")
+            return {}
+
+    def _fetch_upbit(self, symbol, bars=200, timeframe='1d', ticker=None):
         """Fetch from Upbit (KRW Pair)"""
         target_pair = f"{symbol}/KRW"
         
         # Fetch Candles (Day)
-        ohlcv = self.upbit.fetch_ohlcv(target_pair, timeframe='1d', limit=200)
-        if not ohlcv:
+        ohlcv = self._fetch_ohlcv_cached(self.upbit, target_pair, timeframe=timeframe, limit=bars)
+        if not len(ohlcv):
             raise ValueError(f"No OHLCV data for {target_pair}")
             
-        columns = ['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-        df = pd.DataFrame(ohlcv, columns=columns)
-        
-        # Calculate Metrics
-        current = df['Close'].iloc[-1]
-        prev = df['Close'].iloc[-2]
-        change_24h = ((current - prev) / prev) * 100
-        ma_20 = df['Close'].tail(20).mean()
-        vol_avg = df['Volume'].tail(20).mean()
-        
-        return {
-            "symbol": symbol,
-            "name": symbol, # Upbit doesn't provide easy name, fallback to symbol
-            "source": "Upbit (KRW)",
-            "currency": "KRW",
-            "current_price": current,
-            "change_24h": change_24h,
-            "change_1h": self._get_1h_change(self.upbit, target_pair),
-            "ma_20": ma_20,
-            "trend": "Bullish" if current > ma_20 else "Bearish",
-            "volume_status": "High" if df['Volume'].iloc[-1] > vol_avg else "Normal",
-            "raw_df": df
-        }
+        return self._summarize_candles(
+            symbol, ohlcv,
+            name=symbol, # Upbit doesn't provide easy name, fallback to symbol
+            source="Upbit (KRW)",
+            currency="KRW",
+            prev_hour_close=self._get_prev_hour_close(self.upbit, target_pair),
+            ticker=ticker,
+            state_key=(self.upbit.id, target_pair, timeframe)
+        )
 
-    def _get_1h_change(self, exchange, pair):
+    def _get_prev_hour_close(self, exchange, pair):
+        """
+        Close of the last fully closed 1h candle. Closed bars never change, so the
+        cached hourly series is reused until the next hour opens (at most one small
+        incremental request per pair per hour instead of one per call).
+        """
         try:
-            ohlcv = exchange.fetch_ohlcv(pair, timeframe='1h', limit=2)
-            if ohlcv and len(ohlcv) >= 2:
-                prev = ohlcv[-2][4]
-                curr = ohlcv[-1][4]
-                return ((curr - prev) / prev) * 100
-        except:
-            return 0
-        return 0
-
-    def _fetch_binance(self, symbol):
+            ohlcv = self.candle_cache.get_or_load(
+                (exchange.id, pair, '1h'),
+                self._ohlcv_loader(exchange, pair, '1h'),
+                2,
+                closed_only=True
+            )
+            return self._last_closed_close(ohlcv, '1h')
+        except Exception:
+            return None
+
+    @staticmethod
+    def _last_closed_close(ohlcv, timeframe):
+        """Close of the newest bar that opened before the current period"""
+        if ohlcv is None or isinstance(ohlcv, Exception) or not len(ohlcv):
+            return None
+        tf_ms = TIMEFRAME_MS[timeframe]
+        current_open = int(time.time() * 1000) // tf_ms * tf_ms
+        closed = ohlcv[ohlcv[:, 0] < current_open]
+        return float(closed[-1][4]) if len(closed) else None
+
+    def _fetch_binance(self, symbol, bars=200, timeframe='1d', ticker=None):
         """Fetch from Binance (USDT Pair)"""
         target_pair = f"{symbol}/USDT"
         
         # Fetch Candles
-        ohlcv = self.binance.fetch_ohlcv(target_pair, timeframe='1d', limit=200)
-        if not ohlcv:
+        ohlcv = self._fetch_ohlcv_cached(self.binance, target_pair, timeframe=timeframe, limit=bars)
+        if not len(ohlcv):
             raise ValueError(f"No OHLCV data for {target_pair}")
             
-        columns = ['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-        df = pd.DataFrame(ohlcv, columns=columns)
+        return self._summarize_candles(
+            symbol, ohlcv,
+            name=symbol, # Binance Ticker doesn't include name
+            source="Binance",
+            currency="USD",
+            prev_hour_close=self._get_prev_hour_close(self.binance, target_pair),
+            ticker=ticker,
+            state_key=(self.binance.id, target_pair, timeframe)
+        )
+
+    def _summarize_candles(self, symbol, ohlcv, name, source, currency, change_1h=0, ticker=None, prev_hour_close=None,
+                           state_key=None):
+        """
+        Standard asset payload from a candle array.
+        With a `ticker` (from fetch_tickers) the live price and rolling 24h change
+        come from the ticker instead of the last two candles. With `prev_hour_close`
+        change_1h is the live price against the last closed hourly bar.
+        With a `state_key` (exchange, pair, timeframe) the payload also carries
+        EMA/RSI/MACD/ATR from the series' streaming indicator state.
+        """
+        candles = CandleArray(ohlcv)
+        df = candles.to_df(OHLCV_COLUMNS)
         
         # Calculate Metrics
         current = df['Close'].iloc[-1]
         prev = df['Close'].iloc[-2]
         change_24h = ((current - prev) / prev) * 100
+        if ticker and ticker.get('last'):
+            current = ticker['last']
+            if ticker.get('percentage') is not None:
+                change_24h = ticker['percentage']
+        if prev_hour_close:
+            change_1h = ((current - prev_hour_close) / prev_hour_close) * 100
         ma_20 = df['Close'].tail(20).mean()
         vol_avg = df['Volume'].tail(20).mean()
         
         return {
             "symbol": symbol,
-            "name": symbol, # Binance Ticker doesn't include name
-            "source": "Binance",
-            "currency": "USD",
+            "name": name,
+            "source": source,
+            "currency": currency,
             "current_price": current,
             "change_24h": change_24h,
-            "change_1h": self._get_1h_change(self.binance, target_pair),
+            "change_1h": change_1h,
             "ma_20": ma_20,
             "trend": "Bullish" if current > ma_20 else "Bearish",
             "volume_status": "High" if df['Volume'].iloc[-1] > vol_avg else "Normal",
+            **(self._stream_indicators(state_key, candles) if state_key else {}),
             "raw_df": df
         }
 
+    def _stream_indicators(self, key, candles):
+        """
+        Advance the key's IndicatorSet by the closed bars it hasn't seen (O(new bars)),
+        then preview the still-forming last bar. States are kept per window depth,
+        so callers asking for different history lengths never share (and seed) one.
+        """
+        key = (*key, len(candles))
+        try:
+            with self._indicator_lock:
+                state = self._indicator_states.get(key)
+                if state is None:
+                    state = self._indicator_states[key] = IndicatorSet()
+                    while len(self._indicator_states) > self.max_indicator_states:
+                        self._indicator_states.popitem(last=False)
+                else:
+                    self._indicator_states.move_to_end(key)
+                state.advance(candles)
+                values = state.values(candles[-1])
+            # NaN (e.g. RSI of a flat series) is not valid JSON
+            return {k: (None if isinstance(v, float) and v != v else v) for k, v in values.items()}
+        except Exception as e:
+            print(f"[Market] Streaming indicators failed for {key}: {e}")
+            return {}
+
     def _fetch_cmc_quote(self, symbol):
         """
         Fetches latest quote from CMC.
@@ -197,8 +549,7 @@ class MarketDataService:
             'X-CMC_PRO_API_KEY': self.cmc_api_key,
         }
         
-        session = requests.Session()
-        response = session.get(url, headers=headers, params=parameters)
+        response = http_client.get(url, headers=headers, params=parameters)
         data = response.json()
         
         if data['status']['error_code'] != 0:
@@ -233,79 +584,78 @@ class MarketDataService:
             "raw_df": None # Signal to AI that technicals are limited
         }
 
-    def _fetch_cmc_ohlcv(self, symbol):
+    def _fetch_cmc_ohlcv(self, symbol, bars=200):
         """
         Fetch Historical Data from CMC (Requires Standard Plan or higher).
         Endpoint: /v2/cryptocurrency/ohlcv/historical
         """
+        ohlcv = self.candle_cache.get_or_load(
+            ('cmc', symbol, '1d'),
+            lambda since, count: self._load_cmc_ohlcv(symbol, since, count),
+            bars
+        )
+
+        if not len(ohlcv):
+            raise ValueError("Empty OHLCV dataframe from CMC")
+
+        return self._summarize_candles(
+            symbol, ohlcv,
+            # Name comes from the OHLCV response meta (remembered by _load_cmc_ohlcv)
+            name=self._cmc_names.get(symbol, symbol),
+            source="CMC (Historical)",
+            currency="USD",
+            change_1h=0, # OHLCV Daily doesn't have 1h change, set 0
+            state_key=('cmc', symbol, '1d')
+        )
+
+    def _load_cmc_ohlcv(self, symbol, since=None, count=200):
+        """
+        Raw CMC daily OHLCV rows in ccxt layout ([ts_ms, o, h, l, c, v]).
+        With `since` (ms) only the days from that bar onward are requested.
+        """
         url = f"{self.cmc_base_url}/v2/cryptocurrency/ohlcv/historical"
         parameters = {
             'symbol': symbol,
             'convert': 'USD',
-            'count': '200', # 200 days
+            'count': str(count), # days
             'interval': 'daily'
         }
+        if since is not None:
+            # CMC only honours the date part for daily periods; start one day early
+            # so the still-open bar is included, merge_candles drops the overlap
+            start = datetime.utcfromtimestamp(since / 1000 - 86400)
+            parameters['time_start'] = start.strftime('%Y-%m-%d')
         headers = {
             'Accepts': 'application/json',
             'X-CMC_PRO_API_KEY': self.cmc_api_key,
         }
         
-        session = requests.Session()
-        response = session.get(url, headers=headers, params=parameters)
+        get_rate_limiter('cmc').acquire()
+        response = http_client.get(url, headers=headers, params=parameters)
         data = response.json()
         
         if data['status']['error_code'] != 0:
             raise ValueError(data['status']['error_message'])
             
-        # CMC v2 Structure: data -> symbol -> [0] -> quotes
+        # CMC v2 Structure: data: { "BTC": [ { "id": 1, "name": "Bitcoin", "symbol": "BTC", "quotes": [...] } ] }
         if symbol not in data['data']:
              raise ValueError(f"No OHLCV data found for {symbol}")
 
-        quotes = data['data'][symbol][0]['quotes']
+        asset = data['data'][symbol][0]
+        self._cmc_names[symbol] = asset.get('name', symbol)
         
         rows = []
-        for q in quotes:
+        for q in asset['quotes']:
             quote = q['quote']['USD']
-            rows.append({
-                'timestamp': quote['timestamp'],
-                'Open': quote['open'],
-                'High': quote['high'],
-                'Low': quote['low'],
-                'Close': quote['close'],
-                'Volume': quote['volume']
-            })
-            
-        df = pd.DataFrame(rows)
-        if df.empty:
-            raise ValueError("Empty OHLCV dataframe from CMC")
-
-        # Normalize Columns if needed (already standard)
-        
-        # Calculate Metrics similar to other sources
-        current = df['Close'].iloc[-1]
-        prev = df['Close'].iloc[-2]
-        change_24h = ((current - prev) / prev) * 100
-        ma_20 = df['Close'].tail(20).mean()
-        vol_avg = df['Volume'].tail(20).mean()
-        
-        # Get Name context from first response meta if possible, or fallback
-        # CMC OHLCV doesn't give name easily in quotes items, but data[symbol][0] has 'name'?
-        # Actually v2 structure: data: { "BTC": [ { "id": 1, "name": "Bitcoin", "symbol": "BTC", "quotes": [...] } ] }
-        name = data['data'][symbol][0].get('name', symbol)
-        
-        return {
-            "symbol": symbol,
-            "name": name,
-            "source": "CMC (Historical)",
-            "currency": "USD",
-            "current_price": current,
-            "change_24h": change_24h,
-            "change_1h": 0, # OHLCV Daily doesn't have 1h change, set 0
-            "ma_20": ma_20,
-            "trend": "Bullish" if current > ma_20 else "Bearish",
-            "volume_status": "High" if df['Volume'].iloc[-1] > vol_avg else "Normal",
-            "raw_df": df
-        }
+            rows.append([
+                int(pd.Timestamp(quote['timestamp']).timestamp() * 1000),
+                quote['open'],
+                quote['high'],
+                quote['low'],
+                quote['close'],
+                quote['volume']
+            ])
+        return rows
 
     def get_exchange_performance(self, exchange_name='upbit', limit=20):
         """
@@ -469,8 +819,7 @@ class MarketDataService:
                     'Accepts': 'application/json',
                     'X-CMC_PRO_API_KEY': self.cmc_api_key,
                 }
-                session = requests.Session()
-                response = session.get(url, headers=headers, params=parameters)
+                response = http_client.get(url, headers=headers, params=parameters)
                 data = response.json()
                 
                 if data['status']['error_code'] == 0:
@@ -546,8 +895,7 @@ class MarketDataService:
                 'Accepts': 'application/json',
                 'X-CMC_PRO_API_KEY': self.cmc_api_key,
             }
-            session = requests.Session()
-            response = session.get(url, headers=headers)
+            response = http_client.get(url, headers=headers)
             data = response.json()
             
             if data['status']['error_code'] != 0:
@@ -614,7 +962,7 @@ class MarketDataService:
                 "period": period,
                 "limit": limit
             }
-            resp = requests.get(url, params=params, timeout=5)
+            resp = http_client.get(url, params=params, timeout=5)
             data = resp.json()
             
             # Data format: [{"symbol": "BTCUSDT", "longShortRatio": "1.23", "longAccount": "0.55", "shortAccount": "0.45", "timestamp": ...}, ...]
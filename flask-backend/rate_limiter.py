@@ -0,0 +1,290 @@
+"""
+Exchange-aware request throttling shared by every MarketDataService caller.
+
+One token bucket per venue, sized to that venue's public REST limits, so that
+concurrent batch fetches stay under the exchange's budget no matter how many
+worker threads issue requests.
+
+Buckets have two priority lanes. Interactive callers (API requests) may use the
+whole bucket; background callers (scheduler scans) leave a reserve untouched
+and yield while interactive callers are waiting, so a bulk scan can never
+starve a user-facing request. Buckets also learn from the exchange itself:
+used-weight headers pause the background lane before the venue's own limit is
+reached, and 429/418 responses pause the whole venue with exponential backoff.
+
+ccxt clients are wired in with attach_rate_limiter(), which replaces the
+client's own per-instance throttle so every call (candles, tickers, markets,
+trades) is charged its ccxt endpoint cost against the shared bucket.
+"""
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+_lane = contextvars.ContextVar('rate_limit_lane', default=INTERACTIVE)
+
+# (sustained cost units per second, burst size) per venue - public endpoints.
+# Units are ccxt endpoint costs, so heavy endpoints are charged more.
+EXCHANGE_LIMITS = {
+    'binance': (4.0, 8),    # 1 cost = 5 weight: 1200 weight/min of the IP's 6000
+    'upbit': (16.0, 16),    # candles/tickers cost 2: 8 of the 10 req/s allowed
+    'bithumb': (10.0, 10),
+    'cmc': (0.5, 2),        # basic plan: 30 req/min
+}
+DEFAULT_LIMIT = (5.0, 5)
+
+# Share of the burst the background lane may not use
+BACKGROUND_RESERVE = 0.5
+
+# Server-side used-weight header and the limit it counts against
+WEIGHT_HEADERS = {
+    'binance': ('x-mbx-used-weight-1m', 6000),
+}
+SOFT_PRESSURE = 0.8   # pause the background lane above this share of the limit
+HARD_PRESSURE = 0.95  # pause every lane
+
+# First pause after a 429 / 418 (IP ban) with no Retry-After; doubles per repeat
+BACKOFF_BASE = {429: 1.0, 418: 60.0}
+MAX_BACKOFF = 600.0
+
+
+def current_lane():
+    return _lane.get()
+
+
+@contextlib.contextmanager
+def priority_lane(lane):
+    """Run the block (and any ccxt calls it makes) in the given lane"""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def background_job(func):
+    """Wrap a scheduler job so that all of its exchange calls use the background lane"""
+    def run(*args, **kwargs):
+        with priority_lane(BACKGROUND):
+            return func(*args, **kwargs)
+
+    run.__name__ = getattr(func, '__name__', 'background_job')
+    run.__doc__ = getattr(func, '__doc__', None)
+    return run
+
+
+def _parse_upbit_remaining(value):
+    """'group=candles; min=599; sec=9' -> 9"""
+    for part in value.split(';'):
+        name, _, count = part.strip().partition('=')
+        if name == 'sec' and count.isdigit():
+            return int(count)
+    return None
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, exchange_id=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.exchange_id = exchange_id
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self._interactive_waiting = 0
+        self._paused_until = 0.0             # every lane (429 / 418 / hard pressure)
+        self._background_paused_until = 0.0  # background lane only (soft pressure)
+        self._strikes = 0
+        self.used_weight = None
+        self.throttled = 0
+        self.rate_limited = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, weight, lane=INTERACTIVE):
+        """Take `weight` tokens if available; otherwise return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill()
+            if lane == BACKGROUND:
+                if now < self._background_paused_until:
+                    return self._background_paused_until - now
+                if self._interactive_waiting:
+                    return weight / self.rate
+                needed = min(weight + self.capacity * BACKGROUND_RESERVE, self.capacity)
+            else:
+                needed = min(weight, self.capacity)
+            # A call heavier than the bucket waits for a full bucket and leaves it in
+            # debt (negative), which the requests after it wait off
+            if self._tokens >= needed:
+                self._tokens -= weight
+                return 0.0
+            return (needed - self._tokens) / self.rate
+
+    def _begin_wait(self, lane):
+        with self._lock:
+            self.throttled += 1
+            if lane == INTERACTIVE:
+                self._interactive_waiting += 1
+
+    def _end_wait(self, lane):
+        if lane == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting -= 1
+
+    def acquire(self, weight=1, lane=None):
+        """Block until `weight` tokens are available and take them"""
+        lane = lane or current_lane()
+        weight = float(weight)
+        wait = self._try_take(weight, lane)
+        if not wait:
+            return
+        self._begin_wait(lane)
+        try:
+            while wait:
+                time.sleep(wait)
+                wait = self._try_take(weight, lane)
+        finally:
+            self._end_wait(lane)
+
+    async def acquire_async(self, weight=1, lane=None):
+        """Same as acquire() but yields to the event loop while waiting"""
+        lane = lane or current_lane()
+        weight = float(weight)
+        wait = self._try_take(weight, lane)
+        if not wait:
+            return
+        self._begin_wait(lane)
+        try:
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self._try_take(weight, lane)
+        finally:
+            self._end_wait(lane)
+
+    # ------------------------------------------------------------------
+    # Feedback from responses
+    # ------------------------------------------------------------------
+    def observe(self, status, headers):
+        """Update the bucket from a response's status code and rate-limit headers"""
+        headers = headers or {}
+        if status in BACKOFF_BASE:
+            self._back_off(status, headers.get('Retry-After'))
+            return
+        if status is not None and status < 400:
+            with self._lock:
+                self._strikes = 0
+
+        now = time.monotonic()
+        weight_header = WEIGHT_HEADERS.get(self.exchange_id)
+        if weight_header:
+            name, limit = weight_header
+            used = headers.get(name)
+            if used and str(used).isdigit():
+                used = int(used)
+                # Binance counts weight per wall-clock minute
+                until_reset = 60.0 - time.time() % 60.0
+                with self._lock:
+                    self.used_weight = used
+                    if used >= limit * HARD_PRESSURE:
+                        self._paused_until = max(self._paused_until, now + until_reset)
+                    elif used >= limit * SOFT_PRESSURE:
+                        self._background_paused_until = max(self._background_paused_until, now + until_reset)
+
+        remaining = headers.get('Remaining-Req')
+        if remaining:
+            sec = _parse_upbit_remaining(remaining)
+            if sec is not None:
+                with self._lock:
+                    self.used_weight = sec
+                    if sec <= 1:
+                        self._paused_until = max(self._paused_until, now + 1.0)
+                    elif sec <= 3:
+                        self._background_paused_until = max(self._background_paused_until, now + 1.0)
+
+    def _back_off(self, status, retry_after=None):
+        with self._lock:
+            self._strikes += 1
+            self.rate_limited += 1
+            delay = BACKOFF_BASE[status] * (2 ** (self._strikes - 1))
+            if retry_after and str(retry_after).isdigit():
+                delay = max(delay, float(retry_after))
+            delay = min(delay, MAX_BACKOFF)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._tokens = 0.0
+        print(f"[RateLimit] {self.exchange_id} answered {status}, pausing requests for {delay:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            self._refill()
+            now = time.monotonic()
+            return {
+                'tokens': round(self._tokens, 2),
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'paused_for': round(max(0.0, self._paused_until - now), 2),
+                'background_paused_for': round(max(0.0, self._background_paused_until - now), 2),
+                'interactive_waiting': self._interactive_waiting,
+                'used_weight': self.used_weight,
+                'throttled': self.throttled,
+                'rate_limited': self.rate_limited,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(exchange_id):
+    with _limiters_lock:
+        limiter = _limiters.get(exchange_id)
+        if limiter is None:
+            rate, burst = EXCHANGE_LIMITS.get(exchange_id, DEFAULT_LIMIT)
+            limiter = TokenBucket(rate, burst, exchange_id)
+            _limiters[exchange_id] = limiter
+        return limiter
+
+
+def rate_limiter_stats():
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {exchange_id: limiter.stats() for exchange_id, limiter in limiters.items()}
+
+
+def attach_rate_limiter(exchange, is_async=False):
+    """
+    Route a ccxt client's throttling through the shared bucket for its venue.
+    ccxt calls throttle(cost) before every request and on_rest_response() after
+    every response, so this covers all endpoints with their ccxt weights.
+    """
+    limiter = get_rate_limiter(exchange.id)
+    exchange.enableRateLimit = True
+
+    if is_async:
+        async def throttle(cost=None):
+            await limiter.acquire_async(1 if cost is None else cost)
+    else:
+        def throttle(cost=None):
+            limiter.acquire(1 if cost is None else cost)
+
+    on_rest_response = exchange.on_rest_response
+
+    def observe_response(code, reason, url, method, response_headers, *args):
+        try:
+            limiter.observe(code, response_headers)
+        except Exception as e:
+            print(f"[RateLimit] Could not read rate-limit headers from {exchange.id}: {e}")
+        return on_rest_response(code, reason, url, method, response_headers, *args)
+
+    exchange.throttle = throttle
+    exchange.on_rest_response = observe_response
+    return exchange
@@ -1,5 +1,6 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 import atexit
 import logging
 from datetime import datetime
@@ -12,9 +13,10 @@ from news_service import news_service
 from ai_service import ai_service
 from eth_staking_service import eth_staking_service
 from crypto_market.market_gate import run_market_gate_sync
-from crypto_market.patterns.vcp import find_vcp_candidates
+from crypto_market.patterns.vcp import scan_vcp
 from crypto_market.screener import screener_service
 from services import calendar_service
+from rate_limiter import background_job
 
 # Supabase
 from supabase import create_client
@@ -40,50 +42,55 @@ class SchedulerService:
         if not self.scheduler.running:
             self.scheduler.start()
             logger.info("🚀 Scheduler started. Adding jobs sequentially to prevent CPU spike...")
+            # Jobs run in the background rate-limit lane so API requests keep priority on the exchanges
             import time
 
             # 1. ETH Staking (Every 10 mins)
-            self.scheduler.add_job(self.update_eth_staking, IntervalTrigger(hours=24), id='eth', replace_existing=True)
+            self.scheduler.add_job(background_job(self.update_eth_staking), IntervalTrigger(hours=24), id='eth', replace_existing=True)
             time.sleep(2)
             
             # 2. Grok Market Pulse (Every 1 hour)
-            self.scheduler.add_job(self.update_market_analysis, IntervalTrigger(hours=1), id='grok_pulse', replace_existing=True)
+            self.scheduler.add_job(background_job(self.update_market_analysis), IntervalTrigger(hours=1), id='grok_pulse', replace_existing=True)
             time.sleep(3)
             
             # 3. GPT Deep Analysis (Every 4 hours)
-            self.scheduler.add_job(self.update_deep_analysis, IntervalTrigger(hours=4), id='gpt_deep', replace_existing=True)
+            self.scheduler.add_job(background_job(self.update_deep_analysis), IntervalTrigger(hours=4), id='gpt_deep', replace_existing=True)
             time.sleep(2)
 
             # 4. News Feed (Every 15 mins)
-            self.scheduler.add_job(self.update_news_feed, IntervalTrigger(minutes=15), id='news', replace_existing=True)
+            self.scheduler.add_job(background_job(self.update_news_feed), IntervalTrigger(minutes=15), id='news', replace_existing=True)
             time.sleep(2)
             
             # 5. Whale Alerts (Every 5 mins)
-            self.scheduler.add_job(self.run_whale_monitor, IntervalTrigger(minutes=5), id='whale', replace_existing=True)
+            self.scheduler.add_job(background_job(self.run_whale_monitor), IntervalTrigger(minutes=5), id='whale', replace_existing=True)
             time.sleep(2)
 
             # 6. Price Performance (Every 5 mins)
-            self.scheduler.add_job(self.run_price_performance_update, IntervalTrigger(minutes=5), id='price_perf', replace_existing=True)
+            self.scheduler.add_job(background_job(self.run_price_performance_update), IntervalTrigger(minutes=5), id='price_perf', replace_existing=True)
             time.sleep(2)
 
             # 6. Market Gate (Every 1 hour)
-            self.scheduler.add_job(self.run_market_gate, IntervalTrigger(hours=1), id='gate', replace_existing=True)
+            self.scheduler.add_job(background_job(self.run_market_gate), IntervalTrigger(hours=1), id='gate', replace_existing=True)
             time.sleep(2)
 
-            # 7. VCP Scan (Every 1 hour)
-            self.scheduler.add_job(self.run_vcp_scan, IntervalTrigger(hours=1), id='vcp', replace_existing=True)
+            # 7. VCP Scan (Every 4h candle close, UTC)
+            self.scheduler.add_job(background_job(self.run_vcp_scan), CronTrigger(hour='0,4,8,12,16,20', minute=1, timezone='UTC'), id='vcp', replace_existing=True)
             time.sleep(2)
 
             # 8. Screener Scan (Every 1 hour)
-            self.scheduler.add_job(self.run_screeners, IntervalTrigger(hours=1), id='screener', replace_existing=True)
+            self.scheduler.add_job(background_job(self.run_screeners), IntervalTrigger(hours=1), id='screener', replace_existing=True)
             time.sleep(2)
 
             # 9. Calendar Events (Every 12 hours)
-            self.scheduler.add_job(self.update_calendar_events, IntervalTrigger(hours=12), id='calendar', replace_existing=True)
+            self.scheduler.add_job(background_job(self.update_calendar_events), IntervalTrigger(hours=12), id='calendar', replace_existing=True)
             time.sleep(2)
 
             # 10. Validator Queue History (Every 12 hours - sync from GitHub)
-            self.scheduler.add_job(self.sync_validator_queue_history, IntervalTrigger(hours=12), id='validator_queue', replace_existing=True)
+            self.scheduler.add_job(background_job(self.sync_validator_queue_history), IntervalTrigger(hours=12), id='validator_queue', replace_existing=True)
+            time.sleep(2)
+
+            # 11. Lead-Lag Analysis (Every 24 hours - monthly inputs; first run right away in the scheduler thread)
+            self.scheduler.add_job(background_job(self.run_lead_lag_analysis), IntervalTrigger(hours=24), id='lead_lag', replace_existing=True, next_run_time=datetime.now())
             
             logger.info("All scheduler jobs added successfully.")
             atexit.register(lambda: self.scheduler.shutdown())
@@ -91,42 +98,42 @@ class SchedulerService:
             # Run Price Performance immediately on startup for instant data
             logger.info("🚀 Running Price Performance immediately on startup...")
             try:
-                self.run_price_performance_update()
+                background_job(self.run_price_performance_update)()
             except Exception as e:
                 logger.error(f"⚠️ Initial Price Performance failed: {e}")
 
             # Run Market Gate immediately on startup to prevent stale data
             logger.info("🚀 Running Market Gate immediately on startup...")
             try:
-                self.run_market_gate()
+                background_job(self.run_market_gate)()
             except Exception as e:
                 logger.error(f"⚠️ Initial Market Gate failed: {e}")
 
             # Run News Feed immediately
             logger.info("🚀 Running News Feed immediately...")
             try:
-                self.update_news_feed()
+                background_job(self.update_news_feed)()
             except Exception as e:
                 logger.error(f"⚠️ Initial News Feed failed: {e}")
 
             # Run Grok Pulse immediately
             logger.info("🚀 Running Grok Pulse immediately...")
             try:
-                self.update_market_analysis()
+                background_job(self.update_market_analysis)()
             except Exception as e:
                 logger.error(f"⚠️ Initial Grok Pulse failed: {e}")
 
             # Run ETH Staking immediately
             logger.info("🚀 Running ETH Staking immediately...")
             try:
-                self.update_eth_staking()
+                background_job(self.update_eth_staking)()
             except Exception as e:
                 logger.error(f"⚠️ Initial ETH Staking failed: {e}")
 
             # Run GPT Deep Analysis immediately
             logger.info("🚀 Running GPT Deep Analysis immediately...")
             try:
-                self.update_deep_analysis()
+                background_job(self.update_deep_analysis)()
             except Exception as e:
                 logger.error(f"⚠️ Initial GPT Deep Analysis failed: {e}")
 
@@ -167,8 +174,11 @@ class SchedulerService:
     def run_screeners(self):
         logger.info("⏰ Running Crypto Screener Scan...")
         try:
+            # One fetch + one feature table for all three tabs
+            scans = screener_service.run_all_scans()
+
             # 1. Breakout
-            breakout = screener_service.run_breakout_scan()
+            breakout = scans['breakout']
             if self.supabase and breakout:
                 self.supabase.table('analysis_results').insert({
                     'analysis_type': 'SCREENER_BREAKOUT',
@@ -178,7 +188,7 @@ class SchedulerService:
                 logger.info("Screener Breakout Saved")
 
             # 2. Performance
-            perf = screener_service.run_price_performance_scan()
+            perf = scans['performance']
             if self.supabase and perf:
                 self.supabase.table('analysis_results').insert({
                     'analysis_type': 'SCREENER_PERFORMANCE',
@@ -188,7 +198,7 @@ class SchedulerService:
                 logger.info("Screener Performance Saved")
 
             # 3. Risk
-            risk = screener_service.run_risk_scan()
+            risk = scans['risk']
             if self.supabase and risk:
                 self.supabase.table('analysis_results').insert({
                     'analysis_type': 'SCREENER_RISK',
@@ -309,23 +319,58 @@ class SchedulerService:
     def run_vcp_scan(self):
         logger.info("⏰ Running VCP Scan...")
         try:
-            # Get Top 50 symbols for scan
-            from market_provider import market_data_service
-            listings = market_data_service.get_crypto_listings(limit=50)
-            symbols = [item['symbol'] for item in listings]
+            # Top Upbit KRW markets by volume (cached universe)
+            from crypto_market.universe import universe_manager
+            symbols = universe_manager.get_universe('vcp')
             
-            candidates = find_vcp_candidates(symbols)
+            scan = scan_vcp(symbols)
+            candidates, stats = scan['signals'], scan['stats']
+            logger.info(
+                f"VCP scan took {stats['duration_sec']}s: {stats['scanned']}/{stats['symbols']} scanned, "
+                f"{stats['failed']} failed ({stats['timed_out']} timed out)"
+            )
              
             if self.supabase:
+                # data_json: {'signals': [...], 'stats': {...}} (older rows hold the bare list)
                 self.supabase.table('analysis_results').insert({
                     'analysis_type': 'VCP',
-                    'data_json': candidates, 
+                    'data_json': scan, 
                     'created_at': datetime.now().isoformat()
                 }).execute()
                 logger.info(f"✅ VCP Scan Saved: {len(candidates)} found")
         except Exception as e:
             logger.error(f"❌ VCP Scan Failed: {e}")
 
+    def run_lead_lag_analysis(self):
+        logger.info("⏰ Running Lead-Lag Analysis...")
+        try:
+            from crypto_market.lead_lag import fetch_all_data, rank_leading_indicators
+
+            df = fetch_all_data(start_date="2020-01-01", resample="monthly")
+            if df.empty:
+                logger.warning("Lead-Lag: no market data, keeping the previous results")
+                return
+
+            # BTC MoM을 예측하는 선행 지표 찾기
+            target = "BTC_MoM" if "BTC_MoM" in df.columns else "BTC"
+            indicators = rank_leading_indicators(df, target=target, max_lag=6, top=20)
+
+            if self.supabase and indicators:
+                run_at = datetime.now().isoformat()
+                self.supabase.table('lead_lag_results').insert([
+                    {
+                        'run_at': run_at,
+                        'target': target,
+                        'observations': len(df),
+                        **indicator
+                    }
+                    for indicator in indicators
+                ]).execute()
+                significant = sum(1 for i in indicators if i['is_significant'])
+                logger.info(f"✅ Lead-Lag Saved: {significant}/{len(indicators)} significant for {target}")
+        except Exception as e:
+            logger.error(f"❌ Lead-Lag Job Failed: {e}")
+
     def update_calendar_events(self):
         logger.info("⏰ Running Calendar Update...")
         try:
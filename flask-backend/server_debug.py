@@ -539,7 +539,11 @@ def api_vcp_signals():
             import json
             data = response.data[0]['data_json']
             if isinstance(data, str): data = json.loads(data)
-            return jsonify({'signals': data, 'count': len(data), 'timestamp': response.data[0]['created_at']})
+            # Newer rows: {'signals': [...], 'stats': {...}}; older rows: the bare list
+            stats = None
+            if isinstance(data, dict):
+                data, stats = data.get('signals', []), data.get('stats')
+            return jsonify({'signals': data, 'count': len(data), 'stats': stats, 'timestamp': response.data[0]['created_at']})
             
         return jsonify({'signals': [], 'count': 0, 'timestamp': datetime.now().isoformat()})
         
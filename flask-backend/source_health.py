@@ -0,0 +1,94 @@
+"""
+Health tracking for the market data sources behind get_asset_data.
+
+Every attempt against a source (Binance, CoinMarketCap, Upbit) records its
+latency and whether it failed for source-side reasons (network errors,
+timeouts, exchange outages, rate limiting). Latency and error rate are kept
+as exponentially weighted moving averages, and a circuit breaker per source
+lets callers skip a source that keeps failing instead of waiting out its
+timeout on every request. "Symbol not listed" style errors are answers, not
+outages, and count as healthy responses.
+"""
+import threading
+
+import ccxt
+import requests
+
+from http_client import CircuitBreaker
+
+EWMA_ALPHA = 0.2
+DEGRADED_ERROR_RATE = 0.5  # route around a source failing at least this often
+FAILURE_THRESHOLD = 3      # consecutive failures that open the breaker
+RESET_TIMEOUT = 30.0       # seconds before a trial request is let through
+
+SOURCE_FAILURES = (
+    ccxt.NetworkError,  # timeouts, ExchangeNotAvailable, DDoSProtection / 429
+    requests.exceptions.RequestException,
+    TimeoutError,
+)
+
+
+def is_source_failure(exc):
+    return isinstance(exc, SOURCE_FAILURES)
+
+
+class SourceHealth:
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_TIMEOUT)
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        return self.breaker.allow()
+
+    @property
+    def degraded(self):
+        return self.error_rate >= DEGRADED_ERROR_RATE or self.breaker.state != 'closed'
+
+    def record(self, latency, failed):
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.failures += 1
+            self.error_rate += EWMA_ALPHA * ((1.0 if failed else 0.0) - self.error_rate)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += EWMA_ALPHA * (latency - self.latency_ewma)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.breaker.state,
+                'latency_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+                'error_rate': round(self.error_rate, 3),
+                'calls': self.calls,
+                'failures': self.failures,
+            }
+
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def get_source_health(name):
+    with _sources_lock:
+        health = _sources.get(name)
+        if health is None:
+            health = SourceHealth(name)
+            _sources[name] = health
+        return health
+
+
+def source_health_stats():
+    with _sources_lock:
+        sources = dict(_sources)
+    return {name: health.stats() for name, health in sources.items()}
@@ -0,0 +1,131 @@
+"""
+Stale-while-revalidate response cache for latency-sensitive API routes.
+
+A cached value is served as is while it is fresh. Once it goes stale it is
+still served immediately (up to a hard max-staleness bound) while a background
+worker refreshes it, so only the very first request for a key, or one after a
+long idle period, waits on the upstream. Concurrent misses for the same key
+share one load, and a failed refresh keeps serving the last good value.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+
+
+class StaleWhileRevalidate:
+    def __init__(self, max_entries=1024, max_workers=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}            # key -> Future of the running load
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='swr-refresh')
+
+        self.fresh = 0
+        self.stale = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    def get(self, key, loader, fresh_for, max_stale, cacheable=None):
+        """
+        Return (value, age_seconds, state) for key, state being 'fresh', 'stale' or 'miss'.
+        `loader()` produces a new value; values rejected by `cacheable(value)` are
+        returned to the caller but never stored (e.g. error responses).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            age = now - entry[1] if entry is not None else None
+            if entry is not None and age < fresh_for:
+                self._entries.move_to_end(key)
+                self.fresh += 1
+                return entry[0], age, 'fresh'
+
+            if entry is not None and age < max_stale:
+                self._entries.move_to_end(key)
+                self.stale += 1
+                if key not in self._inflight:
+                    future = Future()
+                    self._inflight[key] = future
+                    self._executor.submit(self._load, key, loader, cacheable, future)
+                return entry[0], age, 'stale'
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = Future()
+                self._inflight[key] = future
+
+        if owner:
+            self._load(key, loader, cacheable, future)
+        return future.result(), 0.0, 'miss'
+
+    def _load(self, key, loader, cacheable, future):
+        try:
+            value = loader()
+        except BaseException as e:
+            print(f"[SWR] Refresh failed for {key}: {e}")
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.refresh_errors += 1
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            if cacheable is None or cacheable(value):
+                self._entries.pop(key, None)
+                self._entries[key] = (value, time.time())
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'fresh': self.fresh,
+                'stale': self.stale,
+                'misses': self.misses,
+                'refresh_errors': self.refresh_errors,
+                'refreshing': len(self._inflight),
+            }
+
+
+swr_cache = StaleWhileRevalidate()
+
+
+def swr_cached(fresh_for, max_stale):
+    """
+    Route decorator: serve the view's last 200 response for up to `max_stale`
+    seconds, refreshing it in the background once it is older than `fresh_for`.
+    Keyed by path + query string. Adds `Age` and `X-Cache` response headers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            app = current_app._get_current_object()
+            path = request.full_path
+
+            def load():
+                # Background refreshes run outside the original request
+                with app.test_request_context(path):
+                    response = make_response(view(*args, **kwargs))
+                    return response.get_data(), response.status_code, response.mimetype
+
+            (body, status, mimetype), age, state = swr_cache.get(
+                (view.__name__, path), load, fresh_for, max_stale,
+                cacheable=lambda value: value[1] == 200
+            )
+            response = Response(body, status=status, mimetype=mimetype)
+            response.headers['Age'] = str(int(age))
+            response.headers['X-Cache'] = state.upper()
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,48 @@
+"""
+Regression checks for the streaming indicator state (crypto_market.indicators).
+Runs under pytest or directly: python test_streaming_indicators.py
+"""
+import numpy as np
+import pandas as pd
+
+from crypto_market.indicators import ATRState, IndicatorSet, atr
+from crypto_market.models import CandleArray
+
+
+def make_candles(n=300, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(size=n).cumsum()
+    high = close + rng.uniform(0.5, 3, n)
+    low = close - rng.uniform(0.5, 3, n)
+    ts = np.arange(n) * 86_400_000.0
+    return CandleArray(np.column_stack([ts, close, high, low, close, np.ones(n)]))
+
+
+def test_values_with_live_row_does_not_touch_state():
+    candles = make_candles()
+    state = IndicatorSet().advance(candles)
+    ranges = list(state.atr14.ranges)
+    closed = state.values()
+
+    live = [state.values(candles[-1]) for _ in range(5)]
+    assert all(values == live[0] for values in live)
+    assert state.atr14.ranges == ranges
+    assert state.values() == closed
+
+    # Closed-bar ATR still matches the pandas reference
+    df = pd.DataFrame({'high': candles.high[:-1], 'low': candles.low[:-1], 'close': candles.close[:-1]})
+    assert abs(closed['atr_14'] - atr(df, 14).iloc[-1]) < 1e-9
+
+
+def test_preview_does_not_touch_state():
+    state = ATRState.from_series(make_candles(50).data[:, 2:5].tolist(), period=14)
+    ranges, value = list(state.ranges), state.value
+    previews = [state.preview((120.0, 95.0, 110.0)) for _ in range(5)]
+    assert len(set(previews)) == 1
+    assert state.ranges == ranges and state.value == value
+
+
+if __name__ == '__main__':
+    test_values_with_live_row_does_not_touch_state()
+    test_preview_does_not_touch_state()
+    print("OK")